@@ -1,12 +1,11 @@
 import dash
-from dash import dcc, html, Input, Output, dash_table
+from dash import dcc, html, Input, Output, State, dash_table, ClientsideFunction
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import pandas as pd
-import requests
 from datetime import datetime
-import time
-from threading import Thread
+
+from model_registry import CLASS_NAMES
 
 app = dash.Dash(
     __name__,
@@ -55,20 +54,9 @@ ICON_MAP = {
     'disque_fin_de_vie': 'fa-hard-drive',
     'batterie_faible': 'fa-battery-quarter'
 }
-LABEL_MAPPING = {
-    0: 'normal',
-    1: 'surcharge_cpu',
-    2: 'probleme_ram',
-    3: 'temperature_elevee',
-    4: 'secteurs_defectueux',
-    5: 'erreurs_systeme',
-    6: 'avertissements_systeme',
-    7: 'perte_paquets_reseau',
-    8: 'surchauffe_carte_mere',
-    9: 'surchauffe_gpu',
-    10: 'disque_fin_de_vie',
-    11: 'batterie_faible'
-}
+# Code numérique -> nom de classe, dans l'ordre du LabelEncoder d'entraînement.
+# L'API renvoie déjà des noms; la table ne sert qu'aux anciens codes.
+LABEL_MAPPING = dict(enumerate(CLASS_NAMES))
 
 # Données initiales
 current_data = {
@@ -79,12 +67,8 @@ current_data = {
     'probabilities': {k: 0 for k in COLOR_MAP.keys()}
 }
 
-history_df = pd.DataFrame(columns=[
-    'timestamp', 'prediction', 'confidence',
-    'cpu_usage', 'ram_usage', 'disk_usage',
-    'temperature', 'read_errors', 'write_errors',
-    'reallocated_sectors'
-])
+# Nombre de lignes conservées dans l'historique affiché
+HISTORY_SIZE = 100
 
 # Layout
 app.layout = dbc.Container(fluid=True, children=[
@@ -187,156 +171,43 @@ app.layout = dbc.Container(fluid=True, children=[
         ])
     ]),
    
-    dcc.Interval(id='update-interval', interval=10*1000, n_intervals=0),
-    dcc.Store(id='data-store')
+    # Flux temps réel: assets/stream.js pousse chaque prédiction de /api/stream
+    # dans stream-store, sans interrogation périodique de l'API
+    dcc.Store(id='stream-store'),
+    dcc.Store(id='stream-config', data={
+        'labels': {str(code): name for code, name in LABEL_MAPPING.items()},
+        'defaults': current_data,
+        'history_size': HISTORY_SIZE
+    }),
+    dcc.Store(id='data-store'),
+    dcc.Store(id='history-store', data=[])
 ], style={'backgroundColor': '#222'})
 
-def fetch_data():
-    try:
-        response = requests.get(
-            'http://localhost:5000/api/status',
-            timeout=5
-        )
-       
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('status') == 'success':
-                # Décodage de la prédiction si elle est numérique
-                prediction = data['data'].get('prediction', 'normal')
-                if isinstance(prediction, int):
-                   prediction = LABEL_MAPPING.get(prediction, 'normal')
-                
-                # Mise à jour des données avec la prédiction décodée
-                data['data']['prediction'] = prediction
-                print('Données reçues avec succès')
-                print(f"Réponse API brute: {response.text}")
-                return data['data']
-       
-        print(f"Erreur: {response.status_code} - {response.text}")
-        return None
-       
-    except Exception as e:
-        print(f"Erreur de connexion: {e}")
-        return None
-
-def data_updater():
-    global current_data, history_df
-    
-    # Table de correspondance ABSOLUE (à adapter selon vos classes réelles)
-    LABEL_MAP = {
-        0: 'normal',
-        1: 'surcharge_cpu',
-        2: 'probleme_ram',
-        3: 'temperature_elevee',
-        4: 'secteurs_defectueux',
-        5: 'erreurs_systeme',
-        6: 'avertissements_systeme',
-        7: 'perte_paquets_reseau',
-        8: 'surchauffe_carte_mere',
-        9: 'surchauffe_gpu',
-        10: 'disque_fin_de_vie',
-        11: 'batterie_faible'
-    }
-
-    while True:
-        try:
-            # 1. Récupération des données
-            new_data = fetch_data()
-            
-            if new_data:
-                # 2. Debug: Afficher les données brutes reçues
-                print("\n[DEBUG] Données brutes reçues:", new_data)
-                
-                # 3. Conversion IMPÉRATIVE de la prédiction
-                prediction = new_data.get('prediction')
-                
-                # Cas 1: La prédiction est numérique (int)
-                if isinstance(prediction, int):
-                    new_data['prediction'] = LABEL_MAP.get(prediction, 'inconnu')
-                
-                # Cas 2: La prédiction est une chaîne numérique (ex: "2")
-                elif isinstance(prediction, str) and prediction.isdigit():
-                    new_data['prediction'] = LABEL_MAP.get(int(prediction), 'inconnu')
-                
-                # Cas 3: La prédiction est déjà en texte mais non reconnue
-                elif isinstance(prediction, str) and prediction not in LABEL_MAP.values():
-                    new_data['prediction'] = 'inconnu'
-                
-                # 4. Mise à jour des probabilités (si nécessaire)
-                if 'probabilities' in new_data:
-                    probs = new_data['probabilities']
-                    # Convertir les clés numériques en texte
-                    if any(isinstance(k, int) for k in probs.keys()):
-                        new_probs = {
-                            LABEL_MAP.get(int(k), f'inconnu_{k}'): float(v)
-                            for k, v in probs.items()
-                        }
-                        new_data['probabilities'] = new_probs
-                
-                # 5. Debug: Afficher les données après conversion
-                print("[DEBUG] Données après conversion:", new_data)
-                
-                # 6. Mise à jour des données globales
-                current_data.update(new_data)
-                
-                # 7. Mise à jour de l'historique
-                new_row = {
-                    'timestamp': current_data.get('timestamp', datetime.now().isoformat()),
-                    'prediction': current_data['prediction'],
-                    'confidence': current_data.get('confidence', 0),
-                    'cpu_usage': current_data.get('features', [0]*9)[0],
-                    'ram_usage': current_data.get('features', [0]*9)[1],
-                    'disk_usage': current_data.get('features', [0]*9)[2],
-                    'temperature': current_data.get('features', [0]*9)[4],
-                    'read_errors': current_data.get('features', [0]*9)[5],
-                    'write_errors': current_data.get('features', [0]*9)[6],
-                    'reallocated_sectors': current_data.get('features', [0]*9)[7]
-                }
-                
-                global history_df
-                history_df = pd.concat([history_df, pd.DataFrame([new_row])], ignore_index=True)
-                
-                # Garder seulement les 100 dernières entrées
-                if len(history_df) > 100:
-                    history_df = history_df.iloc[-100:]
-            
-            # Pause entre les mises à jour
-            time.sleep(10)
-            
-        except Exception as e:
-            print(f"[ERREUR] Dans data_updater: {str(e)}")
-            time.sleep(10)  # Pause même en cas d'erreur
-
-update_thread = Thread(target=data_updater, daemon=True)
-update_thread.start()
+# Intégration des événements du flux dans le navigateur (assets/stream.js):
+# ni l'événement ni l'historique ne repassent par le serveur Dash
+app.clientside_callback(
+    ClientsideFunction(namespace='sysmon', function_name='ingest'),
+    Output('data-store', 'data'),
+    Output('history-store', 'data'),
+    Input('stream-store', 'data'),
+    State('history-store', 'data'),
+    State('stream-config', 'data'),
+    prevent_initial_call=True
+)
 
 # Callbacks
 @app.callback(
     Output('main-alert', 'children'),
     Output('main-alert', 'style'),
-    Input('update-interval', 'n_intervals')
+    Input('data-store', 'data')
 )
-def update_main_alert(n):
-    pred = current_data['prediction']
+def update_main_alert(data):
+    data = data or current_data
+    pred = data['prediction']
     if isinstance(pred, int):
-        
-        LABEL_MAPPING = {
-            0: 'normal',
-            1: 'surcharge_cpu',
-            2: 'probleme_ram',
-            3: 'temperature_elevee',
-            4: 'secteurs_defectueux',
-            5: 'erreurs_systeme',
-            6: 'avertissements_systeme',
-            7: 'perte_paquets_reseau',
-            8: 'surchauffe_carte_mere',
-            9: 'surchauffe_gpu',
-            10: 'disque_fin_de_vie',
-            11: 'batterie_faible'
-        }
         pred = LABEL_MAPPING.get(pred, 'inconnu')
 
-    conf = current_data['confidence']
+    conf = data['confidence']
    
     alert_style = {
         'backgroundColor': COLOR_MAP.get(pred, '#7f8c8d'),
@@ -353,18 +224,20 @@ def update_main_alert(n):
 
 @app.callback(
     Output('confidence-kpi', 'children'),
-    Input('update-interval', 'n_intervals')
+    Input('data-store', 'data')
 )
-def update_confidence_kpi(n):
-    return f"{current_data['confidence']:.1f}%"
+def update_confidence_kpi(data):
+    data = data or current_data
+    return f"{data['confidence']:.1f}%"
 
 
 
 @app.callback(
     Output('system-metrics', 'children'),
-    Input('update-interval', 'n_intervals')
+    Input('data-store', 'data')
 )
-def update_system_metrics(n):
+def update_system_metrics(data):
+    data = data or current_data
     try:
         # =============================================
         # SECTION DEBUG - DONNÉES SIMULÉES (À ACTIVER/DÉSACTIVER)
@@ -399,7 +272,7 @@ def update_system_metrics(n):
             print("=== MODE DEBUG ACTIF ===", features)  # Visible dans la console
         else:
             # Mode normal
-            features = current_data.get('features', [0]*9)
+            features = data.get('features', [0]*9)
             if len(features) < 9:
                 features = [0]*9  # Sécurité
         # =============================================
@@ -466,31 +339,16 @@ def update_system_metrics(n):
 
 @app.callback(
     Output('probabilities-chart', 'figure'),
-    Input('update-interval', 'n_intervals')
+    Input('data-store', 'data')
 )
 
-def update_probabilities_chart(n):
+def update_probabilities_chart(data):
+    data = data or current_data
     try:
         # ========================
         # 1. CONFIGURATION GLOBALE
         # ========================
         
-        # Table de correspondance complète (identique à celle de l'API)
-        LABEL_MAPPING = {
-            0: 'normal',
-            1: 'surcharge_cpu',
-            2: 'probleme_ram',
-            3: 'temperature_elevee',
-            4: 'secteurs_defectueux',
-            5: 'erreurs_systeme',
-            6: 'avertissements_systeme',
-            7: 'perte_paquets_reseau',
-            8: 'surchauffe_carte_mere',
-            9: 'surchauffe_gpu',
-            10: 'disque_fin_de_vie',
-            11: 'batterie_faible'
-        }
-
         # Palette de couleurs distinctes pour chaque classe
         COLOR_PALETTE = {
             'normal': '#2ecc71',          # Vert
@@ -512,7 +370,7 @@ def update_probabilities_chart(n):
         # ========================
 
         # Récupération des probabilités brutes
-        raw_probs = current_data.get('probabilities', {})
+        raw_probs = data.get('probabilities', {})
         
         # Dictionnaire nettoyé
         clean_probs = {}
@@ -627,13 +485,14 @@ def update_probabilities_chart(n):
 
 @app.callback(
     Output('recommendations-list', 'children'),
-    Input('update-interval', 'n_intervals')
+    Input('data-store', 'data')
 )
-def update_recommendations(n):
+def update_recommendations(data):
+    data = data or current_data
     try:
         # 1. Récupération des données
-        prediction = current_data.get('prediction', 'normal')
-        features = current_data.get('features', [0]*9)
+        prediction = data.get('prediction', 'normal')
+        features = data.get('features', [0]*9)
         
         # 2. Dictionnaire COMPLET des recommandations de base
         BASE_RECOMMENDATIONS = {
@@ -781,21 +640,11 @@ def update_recommendations(n):
             ],
             className="text-danger"
         )
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='sysmon', function_name='history_table'),
     Output('history-table', 'data'),
-    Input('update-interval', 'n_intervals')
+    Input('history-store', 'data')
 )
-def update_history_table(n):
-    if history_df.empty:
-        return []
-   
-    df = history_df.copy()
-    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime('%H:%M:%S')
-    df['confidence'] = df['confidence'].apply(lambda x: f"{x:.1f}%")
-    df['cpu_usage'] = df['cpu_usage'].apply(lambda x: f"{x:.1f}%")
-    df['temperature'] = df['temperature'].apply(lambda x: f"{x:.1f}°C")
-   
-    return df.sort_values('timestamp', ascending=False).to_dict('records')
 
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=8050, debug=True)
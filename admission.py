@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class AdmissionController:
+    """Limite le nombre de requêtes traitées simultanément, avec une file d'attente bornée
+
+    Au plus `max_concurrent` requêtes sont admises en même temps; au-delà,
+    jusqu'à `max_queue` requêtes attendent au plus `queue_timeout` secondes
+    qu'une place se libère. Les autres sont refusées immédiatement: la
+    latence reste bornée au lieu de s'accumuler dans le serveur jusqu'au
+    délai d'expiration des clients.
+
+    `reserved()`, optionnel, donne le nombre de places occupées ailleurs
+    (abonnés du flux qui gardent un thread): elles sont retirées de la file
+    d'attente, puis des places en cours, au moment de chaque admission.
+    """
+
+    def __init__(self, max_concurrent, max_queue=0, queue_timeout=0.5, reserved=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.reserved = reserved
+        self._condition = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+
+    def limits(self):
+        """(requêtes en cours, requêtes en attente) admissibles, places réservées déduites"""
+        reserved = self.reserved() if self.reserved is not None else 0
+        max_queue = self.max_queue - reserved
+        return max(1, self.max_concurrent + min(0, max_queue)), max(0, max_queue)
+
+    def acquire(self):
+        """True si la requête est admise (appeler release() à la fin), False si refusée"""
+        max_concurrent, max_queue = self.limits()
+        with self._condition:
+            if self.in_flight < max_concurrent and not self.waiting:
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= max_queue:
+                self.rejected_full += 1
+                return False
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        if self.in_flight < max_concurrent:
+                            break
+                        self.rejected_timeout += 1
+                        return False
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def retry_after(self):
+        """Délai conseillé (secondes entières) avant une nouvelle tentative"""
+        return max(1, math.ceil(self.queue_timeout))
+
+    def stats(self):
+        max_concurrent, max_queue = self.limits()
+        with self._condition:
+            return {
+                'max_concurrent': max_concurrent,
+                'max_queue': max_queue,
+                'queue_timeout_s': self.queue_timeout,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_full,
+                'rejected_queue_timeout': self.rejected_timeout
+            }
+
+
+class HostRateLimiter:
+    """Seau à jetons par machine: `rate` requêtes par seconde, rafales de `burst`
+
+    Les seaux sont gardés dans un OrderedDict en ordre d'utilisation; au-delà
+    de `max_hosts`, le moins récemment utilisé est oublié (il repartira plein).
+    """
+
+    def __init__(self, rate, burst, max_hosts=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_hosts = max_hosts
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def allow(self, host, cost=1.0):
+        """(admis, secondes avant qu'assez de jetons soient disponibles)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                tokens = float(self.burst)
+                if len(self._buckets) >= self.max_hosts:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                self._buckets.move_to_end(host)
+
+            if tokens >= cost:
+                self._buckets[host] = [tokens - cost, now]
+                return True, 0.0
+            self._buckets[host] = [tokens, now]
+            self.rejected += 1
+            return False, (cost - tokens) / self.rate
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buckets)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate_per_s': self.rate,
+                'burst': self.burst,
+                'hosts': len(self._buckets),
+                'rejected': self.rejected
+            }
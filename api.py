@@ -1,60 +1,761 @@
-from flask import Flask, request, jsonify
+import time
+_IMPORT_START = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response, g, stream_with_context
 import pickle
-import pandas as pd
+import json
+import hmac
+import hashlib
+import tempfile
+import math
+import threading
+import types
+from contextlib import contextmanager
 import numpy as np
 from datetime import datetime
 import logging
 from flask_cors import CORS
 import joblib
-from sklearn.preprocessing import LabelEncoder
 import os
+from inference import InferenceEngine
+from forest_engine import CompiledForest, cache_is_fresh, compile_model
+from microbatch import MicroBatcher
+from prediction_cache import PredictionCache
+from recommendations import RecommendationTable
+from host_state import HostStateStore, to_epoch
+from history_store import PredictionHistory
+from http_cache import compress_response, state_etag
+from event_stream import EventBroker
+from shadow import ShadowEvaluator
+from admission import AdmissionController, HostRateLimiter
+from async_logging import LOG_FORMAT, AsyncFileLogging, PayloadSampler
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from model_registry import CLASS_NAMES, ModelRegistry, label_encoder_from_metadata, validate_artifacts
+from xgb_backend import XGB_EXTENSIONS, XGBoostBooster
+from binary_protocol import CONTENT_TYPE as BINARY_CONTENT_TYPE, ProtocolError, decode_batch, first_host_id, read_header
+# sklearn n'est importé qu'au besoin (désérialisation du modèle, secours):
+# avec le moteur compilé en cache, le démarrage s'en passe complètement
+
+
+class StartupTimer:
+    """Mesure la durée des étapes du démarrage de l'API
+
+    Après report(), les étapes mesurées (chargements à chaud) vont dans
+    `reload_phases`: les durées du démarrage restent celles du démarrage.
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.phases = {}
+        self.reload_phases = {}
+        self.done = False
+
+    @contextmanager
+    def phase(self, name):
+        phases = self.reload_phases if self.done else self.phases
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases[name] = round((time.perf_counter() - begin) * 1000, 1)
+
+    def total_ms(self):
+        return round((time.perf_counter() - self.start) * 1000, 1)
+
+    def report(self):
+        details = ', '.join(f"{name}: {ms} ms" for name, ms in self.phases.items())
+        logging.info("Démarrage de l'API en %s ms (%s)", self.total_ms(), details)
+        self.done = True
+
+
+startup = StartupTimer(_IMPORT_START)
+startup.phases['imports'] = round((time.perf_counter() - _IMPORT_START) * 1000, 1)
 
 # Configuration de l'application
 app = Flask(__name__)
 CORS(app)  # Activation CORS pour le dashboard
 
 
-# Configuration du logging
-logging.basicConfig(
-    filename='api.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filemode='a'
-)
+# Configuration du logging: écriture dans un thread dédié (LOG_ASYNC=1) avec
+# rotation par taille, ou écriture synchrone comme auparavant (LOG_ASYNC=0)
+LOG_FILE = os.environ.get('LOG_FILE', 'api.log')
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_ASYNC = os.environ.get('LOG_ASYNC', '1') == '1'
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+# Un corps de requête journalisé sur LOG_PAYLOAD_EVERY (0: aucun)
+LOG_PAYLOAD_EVERY = int(os.environ.get('LOG_PAYLOAD_EVERY', 100))
+
+if LOG_ASYNC:
+    AsyncFileLogging(LOG_FILE, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT).install()
+else:
+    logging.basicConfig(filename=LOG_FILE, level=LOG_LEVEL, format=LOG_FORMAT, filemode='a')
+payload_sampler = PayloadSampler(LOG_PAYLOAD_EVERY)
+
+# Fichier du modèle et moteur d'évaluation: 'sklearn' (objet chargé tel quel)
+# ou 'compiled' (forêt aplatie en tableaux NumPy, voir forest_engine.py).
+# Un fichier .xgb (ex: model_deployment/model.xgb) est chargé comme booster
+# XGBoost natif (xgb_backend.py), ses classes étant lues dans METADATA_FILE.
+MODEL_FILE = os.environ.get('MODEL_FILE', 'ml_randomforest.joblib')
+MODEL_ENGINE = os.environ.get('MODEL_ENGINE', 'sklearn')
+# Caches du moteur compilé, hors du registre (ses versions sont immuables)
+MODEL_CACHE_DIR = os.environ.get('MODEL_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'sysmon-model-cache'))
+# Threads OpenMP par booster XGBoost (0 = valeur par défaut de xgboost)
+XGB_THREADS = int(os.environ.get('XGB_THREADS', 0))
+LABEL_ENCODER_FILES = ('label_encoder.joblib', 'label_encoder.pkl')
+METADATA_FILE = os.path.join('model_deployment', 'metadata.json')
+
+# Registre de modèles versionnés (model_registry.py). Sans version publiée,
+# l'API utilise MODEL_FILE comme auparavant.
+MODEL_REGISTRY = os.environ.get('MODEL_REGISTRY', 'models')
+# Période de surveillance du pointeur CURRENT du registre (secondes, 0 = désactivé)
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))
+# Jeton des endpoints /admin; sans jeton, seuls les appels locaux sont acceptés
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+registry = ModelRegistry(MODEL_REGISTRY)
+
+# Ordre des features par défaut (identique à model_deployment/metadata.json)
+DEFAULT_FEATURE_COLUMNS = [
+    'cpu_usage', 'ram_usage', 'disk_usage', 'level',
+    'temperature', 'read_errors', 'write_errors',
+    'reallocated_sectors', 'event_id'
+]
+
+
+def load_metadata(path=METADATA_FILE):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_feature_columns(path=METADATA_FILE):
+    """Ordre des features déclaré dans les métadonnées du modèle déployé"""
+    try:
+        return list(load_metadata(path)['features'])
+    except Exception as e:
+        logging.warning(f"Métadonnées illisibles ({path}), ordre par défaut utilisé: {e}")
+        return list(DEFAULT_FEATURE_COLUMNS)
+
+
+FEATURE_COLUMNS = load_feature_columns()
+N_FEATURES = len(FEATURE_COLUMNS)
+
+def load_label_encoder(paths=LABEL_ENCODER_FILES):
+    """Encodeur des labels: premier fichier lisible (.joblib d'abord, .pkl en secours)"""
+    for i, path in enumerate(paths):
+        try:
+            label_encoder = joblib.load(path)
+            print(f"Chargement réussi depuis {path}!")
+            return label_encoder
+        except Exception:
+            if i == len(paths) - 1:
+                raise
+
+
+def compiled_cache_path(model_file, sources):
+    """Fichier de cache du moteur compilé, nommé d'après les artefacts sources
+
+    La clé (chemins, tailles, dates de modification) change dès qu'un
+    artefact change: chaque version du registre a son propre cache.
+    """
+    key = hashlib.sha256()
+    for path in (model_file, *sources):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            key.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return os.path.join(MODEL_CACHE_DIR, key.hexdigest()[:32] + '.compiled.joblib')
+
+
+def save_compiled_cache(model, model_file, sources, label_classes):
+    """Écrit le cache via un fichier temporaire renommé (lecteurs concurrents)"""
+    cache = compiled_cache_path(model_file, sources)
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=MODEL_CACHE_DIR, suffix='.tmp')
+    os.close(fd)
+    try:
+        model.save(tmp, label_classes=label_classes)
+        os.replace(tmp, cache)
+    except Exception:
+        os.unlink(tmp)
+        raise
 
-# Chargement des artefacts ML
-try:
-    # Essai avec les extensions .joblib d'abord
+
+def load_compiled_cache(model_file, sources):
+    """Moteur compilé et classes depuis le cache, ou None s'il est absent ou périmé"""
+    cache = compiled_cache_path(model_file, sources)
+    if not cache_is_fresh(cache, model_file, *sources):
+        return None
     try:
-        label_encoder = joblib.load('label_encoder.joblib')
-        model = joblib.load('ml_randomforest.joblib')
-        print("Chargement réussi depuis .joblib!")
-    except:
-        # Fallback pour les extensions .pkl
-        label_encoder = joblib.load('label_encoder.pkl')
-        model = joblib.load('ml_randomforest.joblib')
-        print("Chargement réussi depuis .pkl!")
-   
-    print("Classes disponibles:", list(label_encoder.classes_))
-   
-except Exception as e:
-    print("ÉCHEC du chargement avec joblib:", str(e))
-   
-    # Solution de secours
-    if 'label_encoder' not in locals():
-        label_encoder = LabelEncoder()
-        label_encoder.classes_ = np.array(['normal', 'surcharge_cpu', 'probleme_ram',
-                                         'temperature_elevee', 'secteurs_defectueux',
-                                         'erreurs_systeme', 'avertissements_systeme',
-                                         'perte_paquets_reseau', 'surchauffe_carte_mere',
-                                         'surchauffe_gpu', 'disque_fin_de_vie',
-                                         'batterie_faible'])
+        compiled, extra = CompiledForest.load(cache, mmap_mode='r')
+        print("Moteur compilé chargé depuis le cache!")
+        return compiled, types.SimpleNamespace(classes_=extra['label_classes'])
+    except Exception as e:
+        logging.warning(f"Cache du moteur compilé illisible ({cache}): {e}")
+        return None
+
+
+def load_model_file(path):
+    """Booster XGBoost natif ou objet joblib/pickle, selon l'extension"""
+    if path.endswith(XGB_EXTENSIONS):
+        return XGBoostBooster.load(path, XGB_THREADS)
+    return joblib.load(path, mmap_mode='r')
+
+
+def load_model_artifacts(model_file=MODEL_FILE, label_files=LABEL_ENCODER_FILES, metadata=None, fallback=True):
+    """Charge (modèle, label_encoder) depuis le disque
+
+    Sans fichier d'encodeur (`label_files` vide), la table des classes vient
+    de metadata['target_classes']. Avec `fallback`, un modèle par défaut
+    remplace les artefacts illisibles; sinon l'erreur est propagée.
+    """
+    if MODEL_ENGINE == 'compiled':
+        with startup.phase('cache_compile'):
+            cached = load_compiled_cache(model_file, label_files)
+        if cached is not None:
+            return cached
+
+    label_encoder = None
+    try:
+        with startup.phase('label_encoder'):
+            if label_files:
+                label_encoder = load_label_encoder(label_files)
+            else:
+                label_encoder = label_encoder_from_metadata(metadata or {})
+        with startup.phase('modele'):
+            model = load_model_file(model_file)
+       
+        print("Classes disponibles:", list(label_encoder.classes_))
        
+    except Exception as e:
+        if not fallback:
+            raise
+        print("ÉCHEC du chargement avec joblib:", str(e))
+       
+        # Solution de secours
+        if label_encoder is None:
+            from sklearn.preprocessing import LabelEncoder
+            label_encoder = LabelEncoder()
+            label_encoder.classes_ = np.array(CLASS_NAMES)
+           
         # Créer un modèle minimal si nécessaire
         from sklearn.ensemble import RandomForestClassifier
         model = RandomForestClassifier()
         print("Utilisation d'un modèle par défaut!")
 
+    if MODEL_ENGINE == 'compiled':
+        try:
+            with startup.phase('compilation'):
+                model = compile_model(model)
+            print("Moteur compilé activé!")
+        except Exception as e:
+            logging.warning(f"Moteur compilé indisponible, utilisation de sklearn: {e}")
+        else:
+            try:
+                save_compiled_cache(model, model_file, label_files, np.asarray(label_encoder.classes_))
+            except Exception as e:
+                logging.warning(f"Cache du moteur compilé non écrit ({MODEL_CACHE_DIR}): {e}")
+
+    return model, label_encoder
+
+
+# Cache LRU optionnel des prédictions, sur features quantifiées (0 = désactivé).
+# PREDICTION_CACHE_RESOLUTION: un pas commun ou un pas par feature ("1,1,0.5,...")
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 0))
+PREDICTION_CACHE_RESOLUTION = [
+    float(step) for step in os.environ.get('PREDICTION_CACHE_RESOLUTION', '0.5').split(',')
+]
+prediction_cache = PredictionCache(
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_RESOLUTION[0] if len(PREDICTION_CACHE_RESOLUTION) == 1 else PREDICTION_CACHE_RESOLUTION
+) if PREDICTION_CACHE_SIZE > 0 else None
+
+# File de micro-lots: les requêtes /predict concurrentes partagent un même appel au modèle
+MICROBATCH_ENABLED = os.environ.get('MICROBATCH_ENABLED', '1') == '1'
+MICROBATCH_MAX_SIZE = int(os.environ.get('MICROBATCH_MAX_SIZE', 64))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get('MICROBATCH_MAX_WAIT_MS', 2))
+MICROBATCH_TIMEOUT = 10  # secondes
+
+
+def build_model_bundle(new_model, new_label_encoder, version):
+    """Regroupe tout ce qui dépend du modèle, remplacé en une seule affectation"""
+    # Le modèle reçoit des tableaux NumPy: l'ordre des colonnes doit être le sien
+    model_features = getattr(new_model, 'feature_names_in_', None)
+    if model_features is not None and list(model_features) != FEATURE_COLUMNS:
+        logging.warning(f"Ordre des features du modèle différent des métadonnées: {list(model_features)}")
+
+    # Moteur d'inférence (un seul passage du modèle par requête)
+    engine = InferenceEngine(new_model, new_label_encoder)
+    class_keys = engine.class_names.tolist()
+    return types.SimpleNamespace(
+        version=version,
+        loaded_at=datetime.now().isoformat(),
+        model=new_model,
+        label_encoder=new_label_encoder,
+        engine=engine,
+        class_keys=class_keys,
+        # Règles de recommandation compilées pour ces classes
+        recommendations=RecommendationTable(class_keys, FEATURE_COLUMNS),
+        batcher=MicroBatcher(engine.predict, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS) if MICROBATCH_ENABLED else None
+    )
+
+
+def load_version(version):
+    """Charge et valide une version du registre"""
+    metadata = registry.metadata(version)
+    label_file = registry.label_encoder_file(version)
+    model, label_encoder = load_model_artifacts(
+        registry.model_file(version), (label_file,) if label_file else (), metadata, fallback=False
+    )
+    validate_artifacts(model, label_encoder, metadata, FEATURE_COLUMNS)
+    return build_model_bundle(model, label_encoder, version)
+
+
+def load_file_artifacts(model_file=MODEL_FILE, fallback=True):
+    """(modèle, label_encoder) d'un fichier hors registre"""
+    if model_file.endswith(XGB_EXTENSIONS):
+        # Booster natif: pas d'encodeur sérialisé, les classes viennent des métadonnées
+        return load_model_artifacts(model_file, (), load_metadata(), fallback)
+    return load_model_artifacts(model_file, fallback=fallback)
+
+
+def load_current_model():
+    """Version CURRENT du registre, ou MODEL_FILE si le registre est vide ou illisible"""
+    version = registry.current()
+    if version is not None:
+        try:
+            return load_version(version)
+        except Exception as e:
+            logging.error(f"Version {version} du registre inutilisable, chargement de {MODEL_FILE}: {e}")
+    return build_model_bundle(*load_file_artifacts(), os.path.basename(MODEL_FILE))
+
+
+# Modèle courant. Chaque requête lit `active` une seule fois: un remplacement
+# n'affecte que les requêtes suivantes.
+active = None
+
+
+def activate_model(bundle):
+    """Installe un modèle chargé comme modèle courant de l'API"""
+    global active
+    previous, active = active, bundle
+    if prediction_cache is not None:
+        prediction_cache.clear()
+    # L'ancienne file termine les lignes déjà reçues puis s'arrête
+    if previous is not None and previous.batcher is not None:
+        previous.batcher.close()
+
+
+def reload_model():
+    """Recharge le modèle courant depuis le disque (utilisé par serve.py sur SIGHUP)"""
+    activate_model(load_current_model())
+    logging.info(f"Modèle rechargé: {active.version}")
+
+
+# État du dernier remplacement à chaud (GET /admin/model)
+reload_status = {'state': 'inactif', 'version': None, 'error': None, 'duration_ms': None, 'phases': {}}
+_reload_lock = threading.Lock()
+
+
+def swap_model(version, move_pointer=False):
+    """Charge, valide puis active une version, hors du chemin des requêtes
+
+    Retourne False si un autre chargement est déjà en cours. Avec
+    `move_pointer`, le pointeur CURRENT du registre est déplacé après
+    l'activation, ce qui propage la version aux autres workers.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    started = time.perf_counter()
+    reload_status.update(state='chargement', version=version, error=None, duration_ms=None, phases={})
+    startup.reload_phases = {}
+    try:
+        activate_model(load_version(version))
+        if move_pointer:
+            registry.set_current(version)
+        reload_status['state'] = 'actif'
+        MODEL_RELOADS.inc('succes')
+        logging.info("Modèle %s activé", version)
+    except Exception as e:
+        reload_status.update(state='echec', error=str(e))
+        MODEL_RELOADS.inc('echec')
+        logging.error("Échec de l'activation du modèle %s: %s", version, e)
+    finally:
+        reload_status['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        reload_status['phases'] = dict(startup.reload_phases)
+        _reload_lock.release()
+    return True
+
+
+def watch_registry():
+    """Active chaque nouvelle version pointée par CURRENT (une fois par version en échec)"""
+    failed = None
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        try:
+            version = registry.current()
+        except Exception as e:
+            logging.warning(f"Registre de modèles illisible: {e}")
+            continue
+        if version is None or version == active.version or version == failed:
+            continue
+        if swap_model(version):
+            failed = version if reload_status['state'] == 'echec' else None
+
+
+def start_registry_watch():
+    threading.Thread(target=watch_registry, name='model-watch', daemon=True).start()
+
+
+def _after_fork_in_child():
+    # Le verrou a pu être copié pris et le thread de surveillance n'existe plus
+    global _reload_lock
+    _reload_lock = threading.Lock()
+    start_registry_watch()
+
+
+with startup.phase('chargement_total'):
+    activate_model(load_current_model())
+
+if MODEL_WATCH_INTERVAL > 0:
+    start_registry_watch()
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+
+# État par machine: dernière prédiction et historique récent, pour au plus
+# HOST_MAX_HOSTS machines (la moins récemment active est oubliée au-delà)
+HOST_HISTORY_SIZE = int(os.environ.get('HOST_HISTORY_SIZE', 120))
+HOST_MAX_HOSTS = int(os.environ.get('HOST_MAX_HOSTS', 1000))
+state_store = HostStateStore(HOST_HISTORY_SIZE, N_FEATURES, HOST_MAX_HOSTS)
+
+# Historique persistant de toutes les prédictions (GET /api/history):
+# base SQLite HISTORY_DB (vide = désactivé), écrite par lots de
+# HISTORY_BATCH_SIZE lignes ou toutes les HISTORY_FLUSH_MS millisecondes
+HISTORY_DB = os.environ.get('HISTORY_DB', 'history.db')
+HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', 500))
+HISTORY_FLUSH_MS = float(os.environ.get('HISTORY_FLUSH_MS', 1000))
+HISTORY_RETENTION_DAYS = float(os.environ.get('HISTORY_RETENTION_DAYS', 30))
+HISTORY_MAX_POINTS = int(os.environ.get('HISTORY_MAX_POINTS', 1000))
+HISTORY_DEFAULT_RANGE = 24 * 3600  # secondes
+
+with startup.phase('historique'):
+    try:
+        history = PredictionHistory(
+            HISTORY_DB, FEATURE_COLUMNS, HISTORY_BATCH_SIZE, HISTORY_FLUSH_MS / 1000.0,
+            retention_days=HISTORY_RETENTION_DAYS
+        ) if HISTORY_DB else None
+    except Exception as e:
+        logging.error(f"Historique persistant désactivé ({HISTORY_DB}): {e}")
+        history = None
+
+# Serveur de production (serve.py): workers et threads de requête par worker
+API_WORKERS = int(os.environ.get('API_WORKERS', 1))
+API_THREADS = int(os.environ.get('API_THREADS', 16))
+
+# Canal de diffusion des nouvelles prédictions (GET /api/stream). Un abonné
+# occupe un thread de requête tant qu'il reste connecté: au plus
+# STREAM_MAX_SUBSCRIBERS abonnés (par défaut la moitié des threads), les
+# autres threads restent aux prédictions. Refusé avec plusieurs workers.
+STREAM_MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', max(1, API_THREADS // 2)))
+STREAM_RETRY_AFTER = 30  # secondes
+broker = EventBroker(max_subscribers=STREAM_MAX_SUBSCRIBERS)
+
+# Contrôle d'admission des prédictions (/predict, /predict/batch), par processus:
+# au plus ADMISSION_MAX_CONCURRENT requêtes en cours, ADMISSION_QUEUE_SIZE en
+# attente pendant ADMISSION_QUEUE_TIMEOUT_MS au plus, sinon 503 + Retry-After.
+# RATE_LIMIT_PER_HOST requêtes/s par machine (rafales de RATE_LIMIT_BURST),
+# sinon 429 + Retry-After. 0 = désactivé. La machine est le host_id de la
+# requête, ou à défaut l'adresse du client (voir rate_limit_key).
+#
+# Une requête en attente d'admission occupe déjà un thread du serveur: en
+# cours + en attente doivent tenir dans les API_THREADS threads, moins un
+# thread laissé libre pour refuser vite (et servir /api/status). Seuls les
+# abonnés du flux réellement connectés en sont déduits, au moment de
+# l'admission. Au-delà, les requêtes attendraient un thread dans la file du
+# serveur, avant tout contrôle, jusqu'à l'expiration côté client.
+#
+# Avec les micro-lots, une requête admise attend surtout son lot sans occuper
+# de CPU et chacune ajoute une ligne au lot suivant: par défaut tous ces
+# threads peuvent être en cours (jusqu'à MICROBATCH_MAX_SIZE). Sans micro-lots,
+# le calcul se fait dans le thread de la requête: 2 par cœur au plus.
+ADMISSION_THREADS = max(1, API_THREADS - 1)
+ADMISSION_MAX_CONCURRENT = int(os.environ.get(
+    'ADMISSION_MAX_CONCURRENT',
+    min(MICROBATCH_MAX_SIZE, ADMISSION_THREADS) if MICROBATCH_ENABLED
+    else max(1, min(2 * (os.cpu_count() or 1), ADMISSION_THREADS // 2))))
+ADMISSION_QUEUE_SIZE = int(os.environ.get(
+    'ADMISSION_QUEUE_SIZE', max(0, ADMISSION_THREADS - ADMISSION_MAX_CONCURRENT)))
+if ADMISSION_MAX_CONCURRENT + ADMISSION_QUEUE_SIZE > ADMISSION_THREADS:
+    logging.warning(
+        f"ADMISSION_MAX_CONCURRENT + ADMISSION_QUEUE_SIZE = {ADMISSION_MAX_CONCURRENT + ADMISSION_QUEUE_SIZE} "
+        f"dépasse les {ADMISSION_THREADS} threads disponibles pour les prédictions "
+        f"(API_THREADS={API_THREADS}): les requêtes en excès attendront hors du contrôle d'admission")
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_MS', 500))
+RATE_LIMIT_PER_HOST = float(os.environ.get('RATE_LIMIT_PER_HOST', 10))
+RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST', 20))
+ADMISSION_ENDPOINTS = ('predict', 'predict_batch')
+
+admission = AdmissionController(
+    ADMISSION_MAX_CONCURRENT, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_MS / 1000.0,
+    reserved=lambda: len(broker)
+) if ADMISSION_MAX_CONCURRENT > 0 else None
+rate_limiter = HostRateLimiter(
+    RATE_LIMIT_PER_HOST, max(RATE_LIMIT_BURST, 1)
+) if RATE_LIMIT_PER_HOST > 0 else None
+
+# Compression gzip/deflate des réponses d'au moins COMPRESS_MIN_SIZE octets
+# (0 = désactivée) et ETags / If-None-Match -> 304 sur les GET
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 5))
+ETAG_ENABLED = os.environ.get('ETAG_ENABLED', '1') == '1'
+
+# Instrumentation exportée sur GET /metrics (format texte Prometheus)
+metrics = MetricsRegistry()
+REQUESTS_TOTAL = metrics.counter(
+    'sysmon_requests_total', "Requêtes HTTP par endpoint et code de statut", ('endpoint', 'status'))
+REQUEST_SECONDS = metrics.histogram(
+    'sysmon_request_duration_seconds', "Durée totale des requêtes par endpoint", ('endpoint',))
+STAGE_SECONDS = metrics.histogram(
+    'sysmon_stage_duration_seconds',
+    "Durée des étapes d'une prédiction: parse, inference, serialization (réponse, recommandations, JSON)",
+    ('endpoint', 'stage'))
+PREDICTIONS_TOTAL = metrics.counter(
+    'sysmon_predictions_total', "Prédictions par classe", ('prediction',))
+metrics.callback(
+    'sysmon_cache_hits_total', "Prédictions servies par le cache",
+    lambda: prediction_cache.hits if prediction_cache is not None else None, kind='counter')
+metrics.callback(
+    'sysmon_cache_misses_total', "Prédictions absentes du cache",
+    lambda: prediction_cache.misses if prediction_cache is not None else None, kind='counter')
+metrics.callback(
+    'sysmon_microbatch_queue_depth', "Lignes en attente dans la file de micro-lots",
+    lambda: active.batcher.queue_depth() if active.batcher is not None else None)
+metrics.callback(
+    'sysmon_model_info', "Version du modèle actif",
+    lambda: {active.version: 1}, label_names=('version',))
+REJECTED_TOTAL = metrics.counter(
+    'sysmon_rejected_requests_total', "Requêtes refusées (contrôle d'admission, abonnés du flux)", ('endpoint', 'reason'))
+metrics.callback(
+    'sysmon_admission_in_flight', "Prédictions en cours de traitement",
+    lambda: admission.in_flight if admission is not None else None)
+metrics.callback(
+    'sysmon_admission_waiting', "Prédictions en attente d'admission",
+    lambda: admission.waiting if admission is not None else None)
+MODEL_RELOADS = metrics.counter(
+    'sysmon_model_reloads_total', "Remplacements à chaud du modèle par résultat", ('result',))
+SHADOW_SECONDS = metrics.histogram(
+    'sysmon_shadow_call_duration_seconds', "Durée d'un appel (lot) au modèle candidat", ('candidate',))
+
+
+# Modèle candidat évalué sur le trafic réel sans affecter les réponses (shadow.py):
+# version du registre ou fichier de modèle; vide = désactivé.
+# SHADOW_SAMPLE_RATE: fraction des requêtes recopiées vers le candidat;
+# SHADOW_MAX_WAIT_MS: durée de regroupement des lignes avant un appel au candidat
+SHADOW_MODEL = os.environ.get('SHADOW_MODEL', '')
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', 1.0))
+SHADOW_QUEUE_SIZE = int(os.environ.get('SHADOW_QUEUE_SIZE', 1000))
+SHADOW_MAX_WAIT_MS = float(os.environ.get('SHADOW_MAX_WAIT_MS', 50))
+
+
+def load_shadow(candidate):
+    """Évaluateur du modèle candidat, ou None s'il est inutilisable"""
+    try:
+        if candidate in registry.versions():
+            engine = load_version(candidate).engine
+        else:
+            candidate_model, candidate_labels = load_file_artifacts(candidate, fallback=False)
+            validate_artifacts(candidate_model, candidate_labels, load_metadata(), FEATURE_COLUMNS)
+            engine = InferenceEngine(candidate_model, candidate_labels)
+    except Exception as e:
+        logging.error(f"Modèle candidat {candidate} inutilisable, évaluation désactivée: {e}")
+        return None
+    logging.info(f"Évaluation du modèle candidat {candidate} (échantillon: {SHADOW_SAMPLE_RATE})")
+    return ShadowEvaluator(
+        engine.predict, candidate, max_queue=SHADOW_QUEUE_SIZE,
+        max_wait_ms=SHADOW_MAX_WAIT_MS, sample_rate=SHADOW_SAMPLE_RATE, latency_histogram=SHADOW_SECONDS
+    )
+
+
+with startup.phase('candidat'):
+    shadow = load_shadow(SHADOW_MODEL) if SHADOW_MODEL else None
+metrics.callback(
+    'sysmon_shadow_compared_total', "Prédictions comparées avec le modèle candidat",
+    lambda: shadow.compared if shadow is not None else None, kind='counter')
+metrics.callback(
+    'sysmon_shadow_agreed_total', "Prédictions identiques entre principal et candidat",
+    lambda: shadow.agreed if shadow is not None else None, kind='counter')
+metrics.callback(
+    'sysmon_shadow_dropped_total', "Échantillons abandonnés (file du candidat pleine)",
+    lambda: shadow.dropped if shadow is not None else None, kind='counter')
+metrics.callback('sysmon_stream_subscribers', "Abonnés au flux /api/stream", lambda: len(broker))
+metrics.callback('sysmon_hosts', "Machines connues", lambda: len(state_store))
+metrics.callback(
+    'sysmon_hosts_evicted_total', "Machines oubliées (au-delà de HOST_MAX_HOSTS)",
+    lambda: state_store.evicted, kind='counter')
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+def reject(status, reason, message, retry_after):
+    """Réponse de refus rapide avec l'en-tête Retry-After (secondes)"""
+    retry_after = max(1, int(math.ceil(retry_after)))
+    REJECTED_TOTAL.inc(request.url_rule.rule, reason)
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit_key():
+    """Machine à laquelle imputer la requête pour la limite par machine
+
+    L'identifiant déclaré par la requête: host_id (JSON), premier élément de
+    host_ids (JSON, /predict/batch) ou host_id du premier enregistrement
+    (binaire). Sans identifiant valide, repli sur l'adresse du client
+    (default_host_id): les machines derrière un même proxy ou NAT partagent
+    alors une seule limite.
+    """
+    if request.mimetype == BINARY_CONTENT_TYPE:
+        host_id = first_host_id(request.get_data())
+    else:
+        data = request.get_json(silent=True)
+        host_id = None
+        if isinstance(data, dict):
+            host_id = data.get('host_id')
+            host_ids = data.get('host_ids')
+            if host_id is None and isinstance(host_ids, list) and host_ids:
+                host_id = host_ids[0]
+    if host_id is None or parse_host_id(host_id):
+        return default_host_id()
+    return host_id
+
+
+@app.before_request
+def admit_prediction():
+    """Limite par machine puis limite de concurrence
+
+    Le corps est lu (et gardé en cache pour la vue) pour trouver
+    l'identifiant de machine, voir rate_limit_key().
+    """
+    if request.endpoint not in ADMISSION_ENDPOINTS:
+        return None
+    if rate_limiter is not None:
+        allowed, wait = rate_limiter.allow(rate_limit_key())
+        if not allowed:
+            return reject(429, 'rate_limit', 'Trop de requêtes pour cette machine', wait)
+    if admission is not None:
+        if not admission.acquire():
+            return reject(503, 'overload', 'Serveur saturé, réessayer plus tard', admission.retry_after())
+        g.admitted = True
+    return None
+
+
+@app.teardown_request
+def release_admission(exc):
+    if g.pop('admitted', False):
+        admission.release()
+
+
+@app.after_request
+def count_request(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'inconnu'
+    REQUESTS_TOTAL.inc(endpoint, response.status_code)
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint)
+    return response
+
+
+@app.after_request
+def finalize_response(response):
+    """ETag et réponse 304 pour les GET inchangés, puis compression du corps
+
+    Enregistré après count_request, donc exécuté avant lui (ordre inverse
+    de Flask): les métriques voient le statut final.
+    """
+    if (ETAG_ENABLED and request.method in ('GET', 'HEAD') and response.status_code == 200
+            and not response.is_streamed and not response.direct_passthrough):
+        if 'ETag' not in response.headers:
+            response.add_etag(weak=True)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+    if COMPRESS_MIN_SIZE > 0:
+        compress_response(response, request.accept_encodings, COMPRESS_MIN_SIZE, COMPRESS_LEVEL)
+    return response
+
+
+def observe_stages(endpoint, started, parsed, inferred):
+    """Enregistre les durées parse / inference / serialization d'une prédiction"""
+    done = time.perf_counter()
+    STAGE_SECONDS.observe(parsed - started, endpoint, 'parse')
+    STAGE_SECONDS.observe(inferred - parsed, endpoint, 'inference')
+    STAGE_SECONDS.observe(done - inferred, endpoint, 'serialization')
+
+
+def default_host_id():
+    """Identifiant de machine par défaut: l'adresse du client"""
+    return request.remote_addr or 'inconnu'
+
+
+def record_prediction(host_id, response, row):
+    """Met à jour l'état de la machine et notifie les abonnés du flux"""
+    latest = {**response, 'host_id': host_id, 'features': row.tolist()}
+    PREDICTIONS_TOTAL.inc(response['prediction'])
+    state_store.update(host_id, latest, row)
+    if history is not None:
+        # Label tel que renvoyé par l'API (comme /api/status, /api/hosts et les métriques)
+        history.append(host_id, to_epoch(response.get('timestamp')), response['prediction'],
+                       response['confidence'], row)
+    if broker.has_subscribers():
+        broker.publish(latest, host_id)
+
+
+def predict_row(X, bundle):
+    """(label, probabilités) pour la ligne X[0], via le cache et la file de micro-lots du modèle `bundle`"""
+    key = None
+    if prediction_cache is not None:
+        key = prediction_cache.key(X[0])
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return cached
+
+    if bundle.batcher is not None:
+        label, probabilities = bundle.batcher.predict_one(X[0], MICROBATCH_TIMEOUT)
+    else:
+        labels, _, probabilities = bundle.engine.predict(X)
+        label, probabilities = labels[0], probabilities[0]
+
+    result = (label, probabilities.tolist())
+    # Pas de mise en cache d'un résultat de l'ancien modèle après un remplacement
+    if key is not None and bundle is active:
+        prediction_cache.put(key, result)
+    return result
+
+
+def predict_rows(X, bundle):
+    """(labels, probabilités) pour un lot; seules les lignes absentes du cache sont évaluées"""
+    if prediction_cache is None:
+        labels, _, probabilities = bundle.engine.predict(X)
+        return list(labels), probabilities.tolist()
+
+    keys = [prediction_cache.key(row) for row in X]
+    results = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        labels, _, probabilities = bundle.engine.predict(X[missing])
+        for j, i in enumerate(missing):
+            results[i] = (labels[j], probabilities[j].tolist())
+            if bundle is active:
+                prediction_cache.put(keys[i], results[i])
+    return [label for label, _ in results], [probs for _, probs in results]
+
+
+startup.report()
+
 # Configuration des classes
 CLASS_CONFIG = {
     "normal": {"color": "success", "icon": "fa-check-circle"},
@@ -79,188 +780,457 @@ def home():
     <p>Endpoints disponibles:</p>
     <ul>
         <li><b>POST /predict</b> - Recevoir les prédictions</li>
+        <li><b>POST /predict/batch</b> - Prédictions groupées (N lignes, JSON ou application/x-sysmon-batch)</li>
+        <li><b>GET /api/status?host=</b> - Dernier état (d'une machine)</li>
+        <li><b>GET /api/stream</b> - Flux temps réel des prédictions (SSE)</li>
+        <li><b>GET /api/hosts</b> - Dernier état de chaque machine</li>
+        <li><b>GET /api/history?host=&from=&to=&step=</b> - Historique persistant (sous-échantillonné)</li>
+        <li><b>GET /api/batching</b> - Statistiques des micro-lots</li>
+        <li><b>GET /api/admission</b> - Contrôle d'admission (requêtes en cours, en attente, refusées)</li>
+        <li><b>GET /api/shadow</b> - Évaluation du modèle candidat (SHADOW_MODEL)</li>
+        <li><b>GET /api/cache</b> - Statistiques du cache de prédictions</li>
+        <li><b>GET|POST /admin/model</b> - Modèle actif / activer une version du registre</li>
+        <li><b>GET /metrics</b> - Métriques (compteurs, histogrammes de latence)</li>
         <li><b>GET /health</b> - Vérifier l'état du service</li>
         <li><b>GET /classes</b> - Liste des classes supportées</li>
     </ul>
     """
 
+# Nombre maximal de lignes acceptées par /predict/batch
+MAX_BATCH_SIZE = 1000
+# Longueur maximale d'un identifiant de machine (le format binaire en garde HOST_ID_SIZE octets)
+MAX_HOST_ID_LENGTH = 255
+
+# Tampons de features préalloués, un par thread de requête
+_buffers = threading.local()
+
+
+def feature_row():
+    """Ligne float64 préallouée pour le thread courant"""
+    row = getattr(_buffers, 'row', None)
+    if row is None:
+        row = _buffers.row = np.empty((1, N_FEATURES), dtype=np.float64)
+    return row
+
+
+def parse_features(values, out):
+    """Valide une liste de features JSON et l'écrit dans la ligne `out`
+
+    Retourne un message d'erreur, ou None si la ligne est valide.
+    """
+    if not isinstance(values, list) or len(values) != N_FEATURES:
+        return f'{N_FEATURES} features attendues'
+    try:
+        for i, value in enumerate(values):
+            out[i] = float(value)
+    except (TypeError, ValueError):
+        return 'Types de données invalides'
+    if not np.isfinite(out).all():
+        return 'Types de données invalides'
+    return None
+
+
+def parse_host_id(value):
+    """Message d'erreur si `value` n'est pas un identifiant de machine utilisable, sinon None"""
+    if not isinstance(value, str) or not value or len(value) > MAX_HOST_ID_LENGTH:
+        return f'host_id: chaîne de 1 à {MAX_HOST_ID_LENGTH} caractères attendue'
+    return None
+
+
+def parse_row_fields(data, n_rows, now):
+    """(timestamps, host_ids, erreur) d'un lot JSON, validés avant toute inférence
+
+    Chaque champ est optionnel; présent, c'est une liste d'une entrée par
+    ligne (horodatages ISO ou null, identifiants de machine).
+    """
+    timestamps = data.get('timestamps')
+    if timestamps is None:
+        timestamps = [now] * n_rows
+    elif (not isinstance(timestamps, list) or len(timestamps) != n_rows
+          or not all(t is None or isinstance(t, str) for t in timestamps)):
+        return None, None, 'timestamps: liste de chaînes ISO (ou null), une entrée par ligne'
+
+    host_ids = data.get('host_ids')
+    if host_ids is None:
+        host_ids = [default_host_id()] * n_rows
+    elif not isinstance(host_ids, list) or len(host_ids) != n_rows:
+        return None, None, 'host_ids: liste, une entrée par ligne'
+    else:
+        for i, host_id in enumerate(host_ids):
+            error = parse_host_id(host_id)
+            if error:
+                return None, None, f'Ligne {i}: {error}'
+    return timestamps, host_ids, None
+
+
+def read_binary_batch(max_rows):
+    """Décode un corps binaire (binary_protocol.py) en (host_ids, timestamps ISO, X)
+
+    Les features arrivent en float32 et sont lues directement dans un tableau
+    NumPy, sans passer par JSON.
+    """
+    body = request.get_data(cache=False)
+    _, _, count = read_header(body)
+    if count == 0:
+        raise ProtocolError('Lot binaire vide')
+    if count > max_rows:
+        raise ProtocolError(f'{max_rows} lignes maximum par lot')
+    host_ids, epochs, X = decode_batch(body, N_FEATURES)
+    now = datetime.now().isoformat()
+    timestamps = [datetime.fromtimestamp(t).isoformat() if t > 0 else now for t in epochs.tolist()]
+    host_ids = [host_id or default_host_id() for host_id in host_ids]
+    return host_ids, timestamps, X
+
+
+def build_prediction_response(prediction_label, probabilities, recommendations, timestamp, class_keys):
+    """Construit la réponse d'une prédiction avec des types Python natifs
+
+    `probabilities` est une liste de floats, `recommendations` une liste de
+    messages (voir RecommendationTable.for_batch), `class_keys` les classes
+    du modèle qui a produit la prédiction.
+    """
+    return {
+        'status': 'success',
+        'prediction': prediction_label,
+        'confidence': round(max(probabilities) * 100, 2),
+        'probabilities': {
+            cls: round(prob * 100, 2)
+            for cls, prob in zip(class_keys, probabilities)
+        },
+        'recommendations': recommendations,
+        'icon': CLASS_CONFIG.get(prediction_label, {}).get('icon', 'fa-question-circle'),
+        'color': CLASS_CONFIG.get(prediction_label, {}).get('color', 'secondary'),
+        'timestamp': timestamp
+    }
+
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """Endpoint principal pour les prédictions"""
-    global last_prediction
     try:
-        # Debug: Affiche les données reçues
-        logging.info(f"Données reçues: {request.data}")
-       
-        data = request.get_json()
-        if not data or 'features' not in data:
-            logging.error(f"Format invalide. Données reçues: {data}")
-            return jsonify({'error': 'Données manquantes ou format invalide'}), 400
-        if data:
-            print('données bien reçcu')
-        # Vérification des features
-        features = data['features']
-        if len(features) != 9:
-            logging.warning(f"Nombre incorrect de features: {len(features)}")
-            return jsonify({'error': '9 features attendues'}), 400
-       
-        # Création du DataFrame
-        X = pd.DataFrame([features], columns=[
-            'cpu_usage', 'ram_usage', 'disk_usage', 'level',
-            'temperature', 'read_errors', 'write_errors',
-            'reallocated_sectors', 'event_id'
-        ])
-       
-        # Conversion des types
-        try:
-            X = X.astype({
-                'cpu_usage': 'float64',
-                'ram_usage': 'float64',
-                'disk_usage': 'float64',
-                'level': 'int64',
-                'temperature': 'float64',
-                'read_errors': 'int64',
-                'write_errors': 'int64',
-                'reallocated_sectors': 'int64',
-                'event_id': 'int64'
-            })
-        except Exception as e:
-            logging.error(f"Erreur de conversion: {str(e)}")
-            return jsonify({'error': 'Types de données invalides'}), 400
-       
-        # Prédiction
-        prediction = model.predict(X)[0]
-        prediction_label = label_encoder.inverse_transform([prediction])[0]
-        probabilities = model.predict_proba(X)[0]
+        started = time.perf_counter()
+        X = feature_row()
+        if request.mimetype == BINARY_CONTENT_TYPE:
+            # Format binaire compact: un seul enregistrement
+            try:
+                host_ids, timestamps, rows = read_binary_batch(1)
+            except ProtocolError as e:
+                logging.warning("Corps binaire rejeté: %s", e)
+                return jsonify({'error': str(e)}), 400
+            X[0] = rows[0]
+            data = {'host_id': host_ids[0], 'timestamp': timestamps[0]}
+        else:
+            # Échantillon des corps reçus, pour le diagnostic
+            if payload_sampler.should_log():
+                logging.info("Données reçues (échantillon): %s", payload_sampler.excerpt(request.get_data()))
+
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict) or 'features' not in data:
+                logging.error("Format invalide. Données reçues: %s", payload_sampler.excerpt(request.get_data()))
+                return jsonify({'error': 'Données manquantes ou format invalide'}), 400
+            if data.get('host_id') is not None:
+                error = parse_host_id(data['host_id'])
+                if error:
+                    logging.warning("Requête rejetée: %s", error)
+                    return jsonify({'error': error}), 400
+
+            # Validation des features directement dans la ligne préallouée
+            error = parse_features(data['features'], X[0])
+            if error:
+                logging.warning("Features rejetées: %s", error)
+                return jsonify({'error': error}), 400
        
-        def convert_numpy_types(obj):
-            """Convertit récursivement les types NumPy en types natifs Python"""
-            if isinstance(obj, (np.integer)):
-                return int(obj)
-            elif isinstance(obj, (np.floating)):
-                return float(obj)
-            elif isinstance(obj, (np.ndarray, np.generic)):
-                return obj.tolist()
-            elif isinstance(obj, dict):
-                return {k: convert_numpy_types(v) for k, v in obj.items()}
-            elif isinstance(obj, (list, tuple)):
-                return [convert_numpy_types(v) for v in obj]
-            return obj
+        # Prédiction (cache puis file de micro-lots si activés)
+        parsed = time.perf_counter()
+        bundle = active
+        prediction_label, probabilities = predict_row(X, bundle)
+        inferred = time.perf_counter()
 
         # Formatage de la réponse
-        response = {
-            'status': 'success',
-            'prediction': str(prediction_label),  # Conversion explicite
-            'confidence': float(round(np.max(probabilities) * 100, 2)),
-            'probabilities': {
-                str(cls): float(round(prob * 100, 2))  # Conversion explicite
-                for cls, prob in zip(label_encoder.classes_, probabilities)
-            },
-            'recommendations': generate_recommendations(prediction_label, X.iloc[0].to_dict()),
-            'icon': CLASS_CONFIG.get(prediction_label, {}).get('icon', 'fa-question-circle'),
-            'color': CLASS_CONFIG.get(prediction_label, {}).get('color', 'secondary'),
-            'timestamp': data.get('timestamp', datetime.now().isoformat())
-        }
+        response = build_prediction_response(
+            prediction_label, probabilities,
+            bundle.recommendations.for_batch([prediction_label], X)[0],
+            data.get('timestamp') or datetime.now().isoformat(),
+            bundle.class_keys
+        )
        
-        response_converted=convert_numpy_types(response)
-        last_prediction = response_converted  # Stocke la dernière prédiction
-        logging.info(f"Prédiction réussie: {prediction_label}")
-        if last_prediction:
-            print('la prediction a reussi')
-        return jsonify(response_converted)
+        # Stocke la dernière prédiction de la machine
+        record_prediction(data.get('host_id') or default_host_id(), response, X[0])
+        logging.info("Prédiction réussie: %s", prediction_label)
+        body = jsonify(response)
+        observe_stages('/predict', started, parsed, inferred)
+        # Copie vers le modèle candidat: simple dépôt en file, évalué par un autre thread
+        if shadow is not None:
+            shadow.submit(X, [prediction_label])
+        return body
        
     except Exception as e:
-        logging.error(f"Erreur lors de la prédiction: {str(e)}")
+        logging.error("Erreur lors de la prédiction: %s", e)
         return jsonify({
             'status': 'error',
             'message': 'Erreur interne du serveur',
             'details': str(e)
         }), 500
 
-def generate_recommendations(prediction_label, features):
-    """Génère des recommandations personnalisées"""
-    recommendations = []
-    thresholds = {
-        'cpu': {'warning': 85, 'critical': 95},
-        'ram': {'warning': 90, 'critical': 95},
-        'temp': {'warning': 60, 'critical': 80},
-        'sectors': {'warning': 10, 'critical': 50},
-        'errors': {'warning': 5, 'critical': 20}
-    }
-   
-    # Recommandations spécifiques
-    if prediction_label == "surcharge_cpu":
-        recommendations.append("Vérifier les processus CPU")
-        if features['cpu_usage'] > thresholds['cpu']['critical']:
-            recommendations.append("➜ Arrêt immédiat des processus non essentiels!")
-   
-    elif prediction_label == "probleme_ram":
-        recommendations.append("Fermer les applications inutiles")
-        if features['ram_usage'] > thresholds['ram']['critical']:
-            recommendations.append("➜ Upgrade de RAM urgent requis!")
-   
-    elif prediction_label == "temperature_elevee":
-        recommendations.append("Nettoyer les ventilateurs")
-        if features['temperature'] > thresholds['temp']['critical']:
-            recommendations.append("➜ Arrêt immédiat pour éviter les dommages!")
-   
-    elif prediction_label == "secteurs_defectueux":
-        recommendations.append("Surveiller l'état du disque")
-        if features['reallocated_sectors'] > thresholds['sectors']['critical']:
-            recommendations.append("➜ Remplacer le disque immédiatement!")
-   
-    elif prediction_label == "erreurs_systeme":
-        recommendations.append("Analyser les logs système")
-        if features['read_errors'] > thresholds['errors']['critical']:
-            recommendations.append("➜ Intervention technique nécessaire!")
-   
-    elif prediction_label == "avertissements_systeme":
-        recommendations.append("Examiner les avertissements")
-   
-    elif prediction_label == "perte_paquets_reseau":
-        recommendations.append("Vérifier le réseau")
-   
-    elif prediction_label == "surchauffe_carte_mere":
-        recommendations.append("Vérifier le refroidissement")
-        if features['temperature'] > 85:
-            recommendations.append("➜ Arrêt immédiat requis!")
-   
-    elif prediction_label == "surchauffe_gpu":
-        recommendations.append("Réduire la charge GPU")
-        if features['temperature'] > 90:
-            recommendations.append("➜ Arrêt des applications graphiques!")
-   
-    elif prediction_label == "disque_fin_de_vie":
-        recommendations.append("Planifier le remplacement")
-   
-    elif prediction_label == "batterie_faible":
-        recommendations.append("Remplacer la batterie")
-   
-    elif prediction_label == "normal":
-        recommendations.append("Aucune action requise")
-   
-    # Recommandations supplémentaires
-    if features['cpu_usage'] > thresholds['cpu']['warning'] and prediction_label != "surcharge_cpu":
-        recommendations.append(f"CPU élevé ({features['cpu_usage']}%) - surveiller")
-   
-    if features['temperature'] > thresholds['temp']['warning'] and "temperature" not in prediction_label:
-        recommendations.append(f"Température élevée ({features['temperature']}°C)")
-   
-    return recommendations
-# Stockage des dernières données
-last_prediction = None
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Prédictions groupées: N lignes de features évaluées en un seul appel au modèle
+
+    Format attendu:
+        {"features": [[9 valeurs], ...],
+         "timestamps": [...],   (optionnel, un par ligne)
+         "host_ids": [...]}     (optionnel, un par ligne)
+    ou un corps binaire de type application/x-sysmon-batch (binary_protocol.py).
+    Avec ?results=0, la réponse ne contient que le nombre de prédictions.
+    """
+    try:
+        started = time.perf_counter()
+        if request.mimetype == BINARY_CONTENT_TYPE:
+            try:
+                host_ids, timestamps, X = read_binary_batch(MAX_BATCH_SIZE)
+            except ProtocolError as e:
+                logging.warning("Lot binaire rejeté: %s", e)
+                return jsonify({'error': str(e)}), 400
+            n_rows = len(X)
+            now = timestamps[0]
+        else:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict) or 'features' not in data:
+                logging.error("Format invalide pour /predict/batch")
+                return jsonify({'error': 'Données manquantes ou format invalide'}), 400
+
+            rows = data['features']
+            if not isinstance(rows, list) or not rows:
+                return jsonify({'error': 'Liste de features vide ou invalide'}), 400
+            if len(rows) > MAX_BATCH_SIZE:
+                return jsonify({'error': f'{MAX_BATCH_SIZE} lignes maximum par lot'}), 413
+
+            n_rows = len(rows)
+            now = datetime.now().isoformat()
+            timestamps, host_ids, error = parse_row_fields(data, n_rows, now)
+            if error:
+                logging.warning("Lot rejeté: %s", error)
+                return jsonify({'error': error}), 400
+
+            X = np.empty((n_rows, N_FEATURES), dtype=np.float64)
+            for i, row in enumerate(rows):
+                error = parse_features(row, X[i])
+                if error:
+                    logging.warning("Lot rejeté (ligne %d): %s", i, error)
+                    return jsonify({'error': f'Ligne {i}: {error}'}), 400
+
+        # Un seul parcours du modèle pour tout le lot
+        parsed = time.perf_counter()
+        bundle = active
+        labels, probabilities = predict_rows(X, bundle)
+        inferred = time.perf_counter()
+
+        # Recommandations du lot en une passe
+        recommendations = bundle.recommendations.for_batch(labels, X)
+
+        results = []
+        for i, probs in enumerate(probabilities):
+            result = build_prediction_response(
+                labels[i], probs, recommendations[i], timestamps[i] or now, bundle.class_keys
+            )
+            result['host_id'] = host_ids[i]
+            results.append(result)
+            record_prediction(host_ids[i], result, X[i])
+
+        logging.info("Lot de %d prédictions traité", n_rows)
+        if request.args.get('results') == '0':
+            # Envoi en masse (collect.py): seul le décompte est renvoyé
+            body = jsonify({'status': 'success', 'count': n_rows})
+        else:
+            body = jsonify({
+                'status': 'success',
+                'count': n_rows,
+                'results': results
+            })
+        observe_stages('/predict/batch', started, parsed, inferred)
+        if shadow is not None:
+            shadow.submit(X, labels)
+        return body
+
+    except Exception as e:
+        logging.error("Erreur lors de la prédiction groupée: %s", e)
+        return jsonify({
+            'status': 'error',
+            'message': 'Erreur interne du serveur',
+            'details': str(e)
+        }), 500
 
 @app.route('/api/status', methods=['GET'])
 def get_system_status():
-    """Endpoint pour le dashboard - Renvoie les dernières données"""
-    if last_prediction is None:
+    """Endpoint pour le dashboard - Renvoie les dernières données
+
+    ?host=<id> pour une machine donnée, sinon la dernière machine active.
+    """
+    host_id = request.args.get('host')
+    # ETag tiré du numéro de mise à jour: un sondage sans nouvelle prédiction
+    # reçoit 304 sans sérialiser la réponse
+    # (les numéros sont uniques dans le processus, quelle que soit la machine)
+    etag = state_etag('status', state_store.latest_revision(host_id))
+    if ETAG_ENABLED and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    latest = state_store.latest(host_id)
+    if latest is None:
         return jsonify({'error': 'Aucune donnée disponible'}), 404
-   
-    return jsonify({
+
+    response = jsonify({
         'status': 'success',
-        'data': last_prediction,
+        'data': latest,
         'timestamp': datetime.now().isoformat()
     })
+    response.set_etag(etag, weak=True)
+    return response
+
+@app.route('/api/stream', methods=['GET'])
+def stream_predictions():
+    """Flux Server-Sent Events des nouvelles prédictions (?host=<id> pour filtrer)
+
+    Le premier événement est le dernier état connu, puis chaque nouvelle
+    prédiction est poussée dès son enregistrement.
+    """
+    if API_WORKERS > 1:
+        # Diffusion locale au processus: l'abonné ne verrait que les prédictions de son worker
+        return jsonify({'error': 'Flux indisponible avec plusieurs workers (API_WORKERS=1 requis)'}), 503
+    host_id = request.args.get('host')
+    subscriber = broker.subscribe(host_id)
+    if subscriber is None:
+        return reject(503, 'stream_full', "Trop d'abonnés au flux, réessayer plus tard", STREAM_RETRY_AFTER)
+    return Response(
+        stream_with_context(broker.stream(subscriber, state_store.latest(host_id))),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/hosts', methods=['GET'])
+def list_hosts():
+    """Dernier état connu de chaque machine"""
+    hosts = state_store.hosts()
+    return jsonify({'hosts': hosts, 'count': len(hosts)})
+
+@app.route('/api/hosts/<host_id>/history', methods=['GET'])
+def host_history(host_id):
+    """Historique récent (tampon circulaire) d'une machine"""
+    history = state_store.history(host_id)
+    if history is None:
+        return jsonify({'error': 'Machine inconnue'}), 404
+    return jsonify(history)
+
+def parse_time_arg(name, default):
+    """Paramètre de requête en epoch ou ISO 8601 -> secondes epoch (ValueError si illisible)"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/history', methods=['GET'])
+def prediction_history():
+    """Historique persistant d'une machine, sous-échantillonné sur les longues périodes
+
+    Paramètres: host (obligatoire), from / to (ISO ou epoch, par défaut les
+    dernières 24 h), step (secondes par intervalle; par défaut lignes brutes,
+    ou intervalles automatiques au-delà de HISTORY_MAX_POINTS lignes)
+    """
+    if history is None:
+        return jsonify({'error': 'Historique persistant désactivé (HISTORY_DB)'}), 404
+    host_id = request.args.get('host')
+    if not host_id:
+        return jsonify({'error': 'Paramètre host obligatoire (voir /api/hosts)'}), 400
+    try:
+        end = parse_time_arg('to', time.time())
+        start = parse_time_arg('from', end - HISTORY_DEFAULT_RANGE)
+        step = float(request.args.get('step', 0))
+    except ValueError as e:
+        return jsonify({'error': f'Paramètre invalide: {e}'}), 400
+    if start >= end or step < 0:
+        return jsonify({'error': 'Intervalle invalide: from < to et step >= 0 attendus'}), 400
+    # Pas plus fin que la limite de points: élargi pour rester sous HISTORY_MAX_POINTS
+    if step:
+        step = max(step, (end - start) / HISTORY_MAX_POINTS)
+    return jsonify(history.query(host_id, start, end, step, HISTORY_MAX_POINTS))
+
+@app.route('/api/batching', methods=['GET'])
+def batching_stats():
+    """Statistiques de la file de micro-lots (latences p50/p99, débit)"""
+    batcher = active.batcher
+    if batcher is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **batcher.stats()})
+
+@app.route('/api/admission', methods=['GET'])
+def admission_stats():
+    """Requêtes en cours, en attente et refusées (concurrence, limite par machine)"""
+    return jsonify({
+        'concurrency': admission.stats() if admission is not None else {'enabled': False},
+        'rate_limit': rate_limiter.stats() if rate_limiter is not None else {'enabled': False}
+    })
+
+@app.route('/api/shadow', methods=['GET'])
+def shadow_stats():
+    """Comparaison avec le modèle candidat: accord, confusion par classe, latence"""
+    if shadow is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, 'primary': active.version, **shadow.stats()})
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    """Compteurs du cache de prédictions (hits, misses, évictions)"""
+    if prediction_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **prediction_cache.stats()})
+
+def admin_allowed():
+    """Jeton X-Admin-Token si ADMIN_TOKEN est défini, sinon appels locaux uniquement"""
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+@app.route('/admin/model', methods=['GET'])
+def model_status():
+    """Modèle actif, versions du registre et état du dernier remplacement"""
+    if not admin_allowed():
+        return jsonify({'error': 'Accès refusé'}), 403
+    return jsonify({
+        'version': active.version,
+        'loaded_at': active.loaded_at,
+        'registry': MODEL_REGISTRY,
+        'current': registry.current(),
+        'versions': registry.versions(),
+        'reload': dict(reload_status)
+    })
+
+@app.route('/admin/model', methods=['POST'])
+def activate_model_version():
+    """Active une version du registre en arrière-plan: {"version": "..."}
+
+    Le nouveau modèle est chargé et validé sans bloquer les requêtes; les
+    requêtes en cours terminent avec l'ancien. Le pointeur CURRENT est
+    ensuite déplacé pour que les autres workers suivent.
+    """
+    if not admin_allowed():
+        return jsonify({'error': 'Accès refusé'}), 403
+    data = request.get_json(silent=True) or {}
+    version = data.get('version') or registry.current()
+    if version not in registry.versions():
+        return jsonify({'error': f'Version inconnue: {version}'}), 404
+    if _reload_lock.locked():
+        return jsonify({'error': 'Chargement déjà en cours', 'reload': dict(reload_status)}), 409
+    threading.Thread(target=swap_model, args=(version, True), name='model-swap', daemon=True).start()
+    return jsonify({'status': 'chargement', 'version': version}), 202
+
+@app.route('/metrics', methods=['GET'])
+def export_metrics():
+    """Compteurs et histogrammes de latence au format texte Prometheus"""
+    return Response(metrics.render(), mimetype=METRICS_CONTENT_TYPE)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -268,17 +1238,21 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'model_loaded': model is not None,
+        'model_loaded': active.model is not None,
+        'model_version': active.version,
+        'startup_ms': startup.phases,
         'api_version': '1.0.0'
     })
 
 @app.route('/classes', methods=['GET'])
 def list_classes():
-    """Liste des classes supportées"""
+    """Liste des classes supportées (noms, comme les prédictions)"""
+    classes = active.class_keys
     return jsonify({
-        'classes': list(label_encoder.classes_),
-        'count': len(label_encoder.classes_)
+        'classes': classes,
+        'count': len(classes)
     })
 
 if __name__ == '__main__':
+    # Serveur de développement; en production utiliser serve.py
     app.run(host='127.0.0.1', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,109 @@
+// Flux temps réel des prédictions (Server-Sent Events)
+// Chaque événement de /api/stream est poussé dans le dcc.Store 'stream-store';
+// les callbacks clientside ci-dessous en tirent l'état courant et l'historique
+// dans le navigateur, sans aller-retour avec le serveur Dash.
+(function () {
+    var STREAM_URL = window.API_STREAM_URL || 'http://localhost:5000/api/stream';
+    // Délai avant un nouvel essai après un refus de l'API (503: trop d'abonnés, plusieurs workers)
+    var RETRY_MS = 30000;
+    var pending = null;
+
+    function push() {
+        // Dash n'est pas forcément prêt à la réception du premier événement
+        if (!window.dash_clientside || !window.dash_clientside.set_props ||
+                !document.getElementById('stream-store')) {
+            setTimeout(push, 200);
+            return;
+        }
+        if (pending !== null) {
+            window.dash_clientside.set_props('stream-store', {data: pending});
+            pending = null;
+        }
+    }
+
+    function connect() {
+        var source = new EventSource(STREAM_URL);
+        source.onmessage = function (event) {
+            try {
+                pending = JSON.parse(event.data);
+            } catch (e) {
+                return;
+            }
+            push();
+        };
+        source.onerror = function () {
+            if (source.readyState === EventSource.CLOSED) {
+                // Réponse d'erreur HTTP: EventSource abandonne, on réessaie plus tard
+                console.warn('Flux /api/stream refusé, nouvel essai dans ' + RETRY_MS / 1000 + ' s');
+                setTimeout(connect, RETRY_MS);
+            } else {
+                // Coupure réseau: EventSource se reconnecte automatiquement
+                console.warn('Flux /api/stream interrompu, reconnexion...');
+            }
+        };
+    }
+
+    connect();
+})();
+
+(function () {
+    // Nom de classe d'une prédiction: code numérique ("7") via la table du tableau de bord
+    function labelName(prediction, labels) {
+        var key = String(prediction);
+        if (/^\d+$/.test(key)) {
+            return labels[key] || 'inconnu';
+        }
+        return Object.values(labels).indexOf(key) >= 0 ? key : 'inconnu';
+    }
+
+    function percent(value) {
+        return Number(value).toFixed(1) + '%';
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        sysmon: {
+            // Intègre une prédiction poussée par l'API: état courant + historique
+            ingest: function (event, history, config) {
+                if (!event) {
+                    throw window.dash_clientside.PreventUpdate;
+                }
+                var data = Object.assign({}, config.defaults, event);
+                data.prediction = labelName(data.prediction, config.labels);
+                var features = data.features || [0, 0, 0, 0, 0, 0, 0, 0, 0];
+
+                var row = {
+                    timestamp: data.timestamp || new Date().toISOString(),
+                    prediction: data.prediction,
+                    confidence: data.confidence || 0,
+                    cpu_usage: features[0],
+                    ram_usage: features[1],
+                    disk_usage: features[2],
+                    temperature: features[4],
+                    read_errors: features[5],
+                    write_errors: features[6],
+                    reallocated_sectors: features[7]
+                };
+                // Garder seulement les config.history_size dernières entrées
+                return [data, (history || []).concat([row]).slice(-config.history_size)];
+            },
+
+            // Lignes du tableau d'historique, de la plus récente à la plus ancienne
+            history_table: function (history) {
+                if (!history || !history.length) {
+                    return [];
+                }
+                return history.slice().sort(function (a, b) {
+                    return a.timestamp < b.timestamp ? 1 : a.timestamp > b.timestamp ? -1 : 0;
+                }).map(function (row) {
+                    return Object.assign({}, row, {
+                        // Horodatage ISO: heure seule (HH:MM:SS)
+                        timestamp: String(row.timestamp).substr(11, 8),
+                        confidence: percent(row.confidence),
+                        cpu_usage: percent(row.cpu_usage),
+                        temperature: Number(row.temperature).toFixed(1) + '°C'
+                    });
+                });
+            }
+        }
+    });
+})();
@@ -0,0 +1,102 @@
+import atexit
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui laisse le formatage (msg % args) au thread d'écriture
+
+    La file reste dans le processus: l'enregistrement n'a pas besoin d'être
+    préparé pour la sérialisation comme avec une file multiprocessing.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class AsyncFileLogging:
+    """Journalisation hors du chemin des requêtes
+
+    Les threads de requête ne font que déposer l'enregistrement dans une
+    file (QueueHandler); un thread QueueListener le formate et l'écrit dans
+    un fichier à rotation par taille. Le listener est recréé dans chaque
+    processus enfant après un fork (serve.py, preload_app), et vidé à
+    l'arrêt du processus.
+    """
+
+    def __init__(self, filename, level=logging.INFO, max_bytes=10 * 1024 * 1024,
+                 backup_count=5, fmt=LOG_FORMAT):
+        self.filename = filename
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fmt = fmt
+        self.file_handler = None
+        self.queue_handler = None
+        self.listener = None
+
+    def _start_listener(self):
+        self.queue_handler.queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(
+            self.queue_handler.queue, self.file_handler, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def _after_fork(self):
+        # Le thread du listener n'existe pas dans l'enfant: nouvelle file, nouveau
+        # thread, et réouverture du fichier au prochain enregistrement
+        self.file_handler.close()
+        self._start_listener()
+
+    def install(self, logger=None):
+        """Remplace les handlers du logger (racine par défaut) par la file"""
+        logger = logger or logging.getLogger()
+        self.file_handler = logging.handlers.RotatingFileHandler(
+            self.filename, maxBytes=self.max_bytes, backupCount=self.backup_count,
+            encoding='utf-8', delay=True
+        )
+        self.file_handler.setFormatter(logging.Formatter(self.fmt))
+        self.queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(self.queue_handler)
+        logger.setLevel(self.level)
+
+        self._start_listener()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Écrit les enregistrements encore en file puis arrête le listener"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        if self.file_handler is not None:
+            self.file_handler.close()
+
+
+class PayloadSampler:
+    """Ne journalise qu'un corps de requête sur `every` (0: jamais)"""
+
+    def __init__(self, every=100, max_chars=512):
+        self.every = every
+        self.max_chars = max_chars
+        self._counter = itertools.count()
+
+    def should_log(self):
+        return self.every > 0 and next(self._counter) % self.every == 0
+
+    def excerpt(self, payload):
+        """Début du corps, tronqué à max_chars caractères"""
+        text = payload.decode('utf-8', 'replace') if isinstance(payload, bytes) else str(payload)
+        if len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}... ({len(text)} caractères)"
+        return text
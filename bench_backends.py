@@ -0,0 +1,115 @@
+"""Comparaison des moteurs de prédiction sur le même jeu de test
+
+Reproduit la séparation des notebooks (augmented_dataset_shuffled.xlsx,
+train_test_split 80/20, random_state=42), entraîne une forêt aléatoire
+de référence sur la partie apprentissage, puis compare sur la partie test:
+
+- RandomForest sklearn et sa version compilée (forest_engine.py)
+- XGBClassifier sérialisé (ml_randomforest.joblib)
+- booster XGBoost natif (model_deployment/model.xgb, xgb_backend.py)
+
+Mesures: latence d'une ligne (p50/p99), durée d'un lot complet, taille
+sérialisée et mémoire résidente ajoutée au chargement.
+
+Pas d'exactitude: dans ce jeu, event_id détermine seul la classe (un
+event_id par label), tous les moteurs obtiennent donc 1.0 sur n'importe
+quelle partie test, et la séparation utilisée pour entraîner les modèles
+XGBoost n'est pas connue ici. La comparaison porte sur le coût seul.
+
+Usage: python bench_backends.py [nombre_iterations]
+"""
+import gc
+import io
+import os
+import sys
+import types
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from bench_common import FEATURE_COLUMNS, measure
+from forest_engine import CompiledForest
+from inference import InferenceEngine
+from model_registry import CLASS_NAMES
+from xgb_backend import XGBoostBooster
+
+DATASET = 'augmented_dataset_shuffled.xlsx'
+
+
+def resident_memory():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def load_holdout():
+    """Séparation identique aux notebooks; level et label encodés par ordre alphabétique"""
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_excel(DATASET)
+    df['level'] = df['level'].map({name: i for i, name in enumerate(sorted(df['level'].unique()))})
+    y = df['label'].map({name: i for i, name in enumerate(CLASS_NAMES)}).to_numpy()
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def load_with_footprint(load):
+    """(modèle, mémoire résidente ajoutée en octets ou None)"""
+    gc.collect()
+    before = resident_memory()
+    model = load()
+    after = resident_memory()
+    return model, (after - before) if before is not None else None
+
+
+def main(iterations=300):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X_train, X_test, y_train, _ = load_holdout()
+    forest = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1).fit(X_train, y_train)
+    forest.set_params(n_jobs=1)
+
+    buffer = io.BytesIO()
+    joblib.dump(forest, buffer)
+    forest_bytes = buffer.getvalue()
+    compiled_path = 'bench_forest.compiled.joblib'
+    CompiledForest.from_sklearn(forest).save(compiled_path)
+
+    candidates = {
+        'RandomForest sklearn': (
+            lambda: joblib.load(io.BytesIO(forest_bytes)), len(forest_bytes)),
+        'RandomForest compilé': (
+            lambda: CompiledForest.load(compiled_path, mmap_mode=None)[0], os.path.getsize(compiled_path)),
+        'XGBClassifier (joblib)': (
+            lambda: joblib.load('ml_randomforest.joblib'), os.path.getsize('ml_randomforest.joblib')),
+        'XGBoost natif (.xgb)': (
+            lambda: XGBoostBooster.load(os.path.join('model_deployment', 'model.xgb')),
+            os.path.getsize(os.path.join('model_deployment', 'model.xgb'))),
+    }
+
+    # Encodeur minimal: code -> nom de classe
+    labels = types.SimpleNamespace(classes_=np.array(CLASS_NAMES, dtype=object))
+    row = X_test[:1]
+    print(f"Jeu de test: {len(X_test)} lignes - {iterations} itérations par ligne")
+    print(f"{'moteur':<24} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'lot (ms)':>9} {'fichier (Ko)':>13} {'RSS (Ko)':>9}")
+    try:
+        for name, (load, size) in candidates.items():
+            model, footprint = load_with_footprint(load)
+            engine = InferenceEngine(model, labels)
+            single = measure(lambda: engine.predict(row), iterations)
+            batch = measure(lambda: engine.predict(X_test), 5)
+            rss = f"{footprint / 1024:>9.0f}" if footprint is not None else f"{'-':>9}"
+            print(f"{name:<24} {np.percentile(single, 50):>9.3f} "
+                  f"{np.percentile(single, 99):>9.3f} {np.percentile(batch, 50):>9.1f} "
+                  f"{size / 1024:>13.0f} {rss}")
+            del model, engine
+    finally:
+        os.remove(compiled_path)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
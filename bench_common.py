@@ -0,0 +1,30 @@
+"""Outils communs aux scripts bench_*.py: échantillon de référence, mesure et affichage des latences"""
+import time
+
+import numpy as np
+
+FEATURE_COLUMNS = [
+    'cpu_usage', 'ram_usage', 'disk_usage', 'level',
+    'temperature', 'read_errors', 'write_errors',
+    'reallocated_sectors', 'event_id'
+]
+
+# Échantillon réel tiré de api.log
+SAMPLE = [32.0, 89.9, 71.0, 1.0, 25.0, 0.0, 0.0, 9984.0, 134.0]
+
+
+def measure(func, iterations):
+    """Retourne les latences (ms) de func sur plusieurs itérations"""
+    func()  # Échauffement
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def report(name, timings, width=28, digits=3):
+    print(f"{name:<{width}} p50={np.percentile(timings, 50):7.{digits}f} ms  "
+          f"p99={np.percentile(timings, 99):7.{digits}f} ms  "
+          f"moyenne={timings.mean():7.{digits}f} ms")
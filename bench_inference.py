@@ -0,0 +1,41 @@
+"""Micro-benchmark de la latence d'inférence par requête
+
+Compare l'ancien chemin de /predict (model.predict + inverse_transform +
+model.predict_proba) avec InferenceEngine (un seul predict_proba).
+
+Usage: python bench_inference.py [nombre_iterations]
+"""
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from bench_common import FEATURE_COLUMNS, SAMPLE, measure, report
+from inference import InferenceEngine
+
+
+def main(iterations=500):
+    model = joblib.load('ml_randomforest.joblib')
+    label_encoder = joblib.load('label_encoder.joblib')
+    engine = InferenceEngine(model, label_encoder)
+    X = pd.DataFrame([SAMPLE], columns=FEATURE_COLUMNS)
+
+    def before():
+        prediction = model.predict(X)[0]
+        label_encoder.inverse_transform([prediction])[0]
+        model.predict_proba(X)[0]
+
+    def after():
+        engine.predict(X)
+
+    print(f"Modèle: {type(model).__name__} - {iterations} itérations")
+    avant = measure(before, iterations)
+    apres = measure(after, iterations)
+    report("avant (predict + proba)", avant)
+    report("après (InferenceEngine)", apres)
+    print(f"Gain médian: x{np.percentile(avant, 50) / np.percentile(apres, 50):.2f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
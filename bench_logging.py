@@ -0,0 +1,61 @@
+"""Coût de la journalisation par requête /predict
+
+Rejoue les écritures de journal d'une requête avec l'ancienne
+configuration (FileHandler synchrone, corps complet journalisé à chaque
+requête, f-strings) puis avec la nouvelle (AsyncFileLogging, corps
+échantillonné, formatage différé). Seul le temps passé dans le thread
+appelant est mesuré: c'est lui qui s'ajoute à la latence de la requête.
+
+Usage: python bench_logging.py [nombre_iterations]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from async_logging import LOG_FORMAT, AsyncFileLogging, PayloadSampler
+from bench_common import SAMPLE, measure, report
+
+BODY = json.dumps({'features': SAMPLE, 'timestamp': '2025-04-07T10:12:31.381112'}).encode('utf-8')
+
+
+def main(iterations=5000):
+    logger = logging.getLogger()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Avant: écriture synchrone, corps complet à chaque requête
+        handler = logging.FileHandler(os.path.join(tmp, 'sync.log'), encoding='utf-8')
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.handlers = [handler]
+        logger.setLevel(logging.INFO)
+
+        def before():
+            logging.info(f"Données reçues: {BODY}")
+            logging.info(f"Prédiction réussie: {'normal'}")
+
+        avant = measure(before, iterations)
+        handler.close()
+
+        # Après: file + thread d'écriture, corps échantillonné
+        async_logging = AsyncFileLogging(os.path.join(tmp, 'async.log')).install(logger)
+        sampler = PayloadSampler()
+
+        def after():
+            if sampler.should_log():
+                logging.info("Données reçues (échantillon): %s", sampler.excerpt(BODY))
+            logging.info("Prédiction réussie: %s", 'normal')
+
+        apres = measure(after, iterations)
+        async_logging.stop()
+        logger.handlers = []
+
+    print(f"Journalisation d'une requête /predict - {iterations} itérations")
+    report("avant (synchrone, corps complet)", avant, width=32, digits=4)
+    report("après (file, échantillonné)", apres, width=32, digits=4)
+    print(f"Gain médian: x{np.percentile(avant, 50) / np.percentile(apres, 50):.2f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
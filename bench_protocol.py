@@ -0,0 +1,59 @@
+"""Comparaison JSON / binaire pour l'envoi des échantillons à l'API
+
+Mesure, pour plusieurs tailles de lot, la taille du corps envoyé et le coût
+de décodage côté API jusqu'au tableau NumPy de features: json.loads puis
+conversion ligne par ligne (chemin de /predict/batch), contre
+binary_protocol.decode_batch.
+
+Usage: python bench_protocol.py [nombre_iterations]
+"""
+import json
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bench_common import SAMPLE, measure
+from binary_protocol import decode_batch, encode_batch
+
+N_FEATURES = 9
+BATCH_SIZES = (1, 64, 1000)
+
+
+def json_body(n_rows, host_id, epoch):
+    timestamp = datetime.fromtimestamp(epoch).isoformat()
+    return json.dumps({
+        'features': [SAMPLE] * n_rows,
+        'timestamps': [timestamp] * n_rows,
+        'host_ids': [host_id] * n_rows
+    }).encode('utf-8')
+
+
+def decode_json(body):
+    """Même travail que /predict/batch pour un corps JSON"""
+    data = json.loads(body)
+    X = np.empty((len(data['features']), N_FEATURES), dtype=np.float64)
+    for i, row in enumerate(data['features']):
+        for j, value in enumerate(row):
+            X[i, j] = float(value)
+    return data['host_ids'], data['timestamps'], X
+
+
+def main(iterations=500):
+    host_id = 'poste-atelier-01'
+    epoch = time.time()
+    print(f"{'lot':>5} {'JSON (o)':>10} {'binaire (o)':>12} "
+          f"{'JSON p50 (ms)':>14} {'binaire p50 (ms)':>17} {'gain':>6}")
+    for n_rows in BATCH_SIZES:
+        as_json = json_body(n_rows, host_id, epoch)
+        as_binary = encode_batch([(host_id, epoch, SAMPLE)] * n_rows, N_FEATURES)
+
+        json_ms = np.percentile(measure(lambda: decode_json(as_json), iterations), 50)
+        binary_ms = np.percentile(measure(lambda: decode_batch(as_binary, N_FEATURES), iterations), 50)
+        print(f"{n_rows:>5} {len(as_json):>10} {len(as_binary):>12} "
+              f"{json_ms:>14.4f} {binary_ms:>17.4f} {json_ms / binary_ms:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
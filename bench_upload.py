@@ -0,0 +1,69 @@
+"""Coût d'envoi des échantillons à une API démarrée (python serve.py ou api.py)
+
+Compare, pour un même nombre d'échantillons:
+
+- un requests.post par échantillon vers /predict, sans réutilisation de
+  connexion (ancien collect.py)
+- une session keep-alive et un lot de N échantillons par requête vers
+  /predict/batch?results=0 (collect.py, COLLECT_FLUSH_SAMPLES=N)
+
+Mesure la durée totale côté client et la durée par échantillon. Désactiver
+la limite par machine de l'API (RATE_LIMIT_PER_HOST=0) pendant la mesure.
+
+Usage: python bench_upload.py [nombre_echantillons]   (API_URL, défaut http://127.0.0.1:5000)
+"""
+import os
+import sys
+import time
+
+import requests
+
+from bench_common import SAMPLE
+from binary_protocol import CONTENT_TYPE, encode_batch
+
+API_URL = os.environ.get('API_URL', 'http://127.0.0.1:5000').rstrip('/')
+BATCH_SIZES = (1, 10, 100)
+
+
+def per_sample_posts(n_samples):
+    for _ in range(n_samples):
+        response = requests.post(API_URL + '/predict', json={'features': SAMPLE}, timeout=15)
+        response.raise_for_status()
+
+
+def session_batches(n_samples, batch_size, binary):
+    with requests.Session() as session:
+        for start in range(0, n_samples, batch_size):
+            rows = min(batch_size, n_samples - start)
+            if binary:
+                response = session.post(
+                    API_URL + '/predict/batch?results=0',
+                    data=encode_batch([('bench', time.time(), SAMPLE)] * rows),
+                    headers={'Content-Type': CONTENT_TYPE}, timeout=15)
+            else:
+                response = session.post(
+                    API_URL + '/predict/batch?results=0', json={'features': [SAMPLE] * rows}, timeout=15)
+            response.raise_for_status()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(n_samples=500):
+    session_batches(10, 10, False)  # Échauffement (modèle, connexions)
+    print(f"{n_samples} échantillons vers {API_URL}")
+    print(f"{'mode':<36} {'total (s)':>10} {'par échantillon (ms)':>21}")
+    baseline = timed(per_sample_posts, n_samples)
+    print(f"{'requests.post par échantillon':<36} {baseline:>10.2f} {baseline / n_samples * 1000:>21.3f}")
+    for binary in (False, True):
+        for batch_size in BATCH_SIZES:
+            elapsed = timed(session_batches, n_samples, batch_size, binary)
+            name = f"session, lots de {batch_size} ({'binaire' if binary else 'JSON'})"
+            print(f"{name:<36} {elapsed:>10.2f} {elapsed / n_samples * 1000:>21.3f}  {baseline / elapsed:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,87 @@
+import struct
+
+import numpy as np
+
+# Type de contenu des lots binaires (collect.py -> /predict, /predict/batch)
+CONTENT_TYPE = 'application/x-sysmon-batch'
+
+# En-tête: magique, version, nombre de features, taille du champ host_id,
+# nombre d'enregistrements (petit-boutiste, 12 octets)
+MAGIC = b'SMB1'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHI')
+HOST_ID_SIZE = 32
+
+
+class ProtocolError(ValueError):
+    """Corps binaire illisible ou incohérent avec son en-tête"""
+
+
+def record_dtype(n_features, host_id_size=HOST_ID_SIZE):
+    """Disposition fixe d'un enregistrement: host_id, horodatage epoch, features float32"""
+    return np.dtype([
+        ('host_id', f'S{host_id_size}'),
+        ('timestamp', '<f8'),
+        ('features', '<f4', (n_features,)),
+    ])
+
+
+def encode_records(samples, n_features=9, host_id_size=HOST_ID_SIZE):
+    """Enregistrements bruts (sans en-tête) d'une liste de (host_id, timestamp epoch, features)"""
+    records = np.zeros(len(samples), dtype=record_dtype(n_features, host_id_size))
+    for i, (host_id, timestamp, features) in enumerate(samples):
+        records[i] = (host_id.encode('utf-8')[:host_id_size], timestamp, features)
+    return records.tobytes()
+
+
+def frame_records(data, n_features=9, host_id_size=HOST_ID_SIZE):
+    """Corps binaire complet: en-tête + enregistrements déjà encodés (spool de collect.py)"""
+    count = len(data) // record_dtype(n_features, host_id_size).itemsize
+    return HEADER.pack(MAGIC, VERSION, n_features, host_id_size, count) + data
+
+
+def encode_batch(samples, n_features=9, host_id_size=HOST_ID_SIZE):
+    """Encode une liste de (host_id, timestamp epoch, features) en un seul corps binaire"""
+    return frame_records(encode_records(samples, n_features, host_id_size), n_features, host_id_size)
+
+
+def read_header(body):
+    """Retourne (n_features, host_id_size, nombre d'enregistrements)"""
+    if len(body) < HEADER.size:
+        raise ProtocolError('En-tête binaire incomplet')
+    magic, version, n_features, host_id_size, count = HEADER.unpack_from(body)
+    if magic != MAGIC or version != VERSION:
+        raise ProtocolError('Format binaire non reconnu')
+    return n_features, host_id_size, count
+
+
+def first_host_id(body):
+    """host_id du premier enregistrement, sans décoder le lot (None si absent ou illisible)"""
+    try:
+        _, host_id_size, count = read_header(body)
+    except ProtocolError:
+        return None
+    if count == 0 or len(body) < HEADER.size + host_id_size:
+        return None
+    return body[HEADER.size:HEADER.size + host_id_size].rstrip(b'\0').decode('utf-8', 'replace') or None
+
+
+def decode_batch(body, n_features):
+    """Décode un corps binaire sans copie intermédiaire
+
+    Retourne (host_ids, timestamps epoch float64, features float64 (n, n_features)).
+    Un host_id vide est rendu comme None.
+    """
+    body_features, host_id_size, count = read_header(body)
+    if body_features != n_features:
+        raise ProtocolError(f'{n_features} features attendues')
+    dtype = record_dtype(n_features, host_id_size)
+    if len(body) != HEADER.size + count * dtype.itemsize:
+        raise ProtocolError('Taille du corps incohérente avec son en-tête')
+
+    records = np.frombuffer(body, dtype=dtype, count=count, offset=HEADER.size)
+    X = records['features'].astype(np.float64)
+    if not np.isfinite(X).all():
+        raise ProtocolError('Types de données invalides')
+    host_ids = [host_id.decode('utf-8', 'replace') or None for host_id in records['host_id'].tolist()]
+    return host_ids, records['timestamp'].astype(np.float64), X
@@ -1,23 +1,38 @@
 import psutil
 import time
-import wmi
-import win32evtlog
 from datetime import datetime
 import sys
-import ctypes
 import logging
 import requests
 import json
 from strict_serializer import StrictEncoder
 import pickle
 import base64
+import os
+import socket
+import threading
+import numpy as np
+from binary_protocol import CONTENT_TYPE as BINARY_CONTENT_TYPE, encode_records, frame_records, record_dtype
+from spool import DiskSpool
+from probe_scheduler import ProbeCosts, ProbeScheduler
+
+# Sondes: 'windows' (WMI, journal d'événements) ou 'linux' (/proc, /sys, smartctl, syslog)
+BACKEND = os.environ.get('COLLECT_BACKEND', 'windows' if os.name == 'nt' else 'linux')
+if BACKEND == 'windows':
+    import ctypes
+    import pythoncom
+    import win32evtlog
+    from wmi_probes import WMIProbe
+else:
+    from linux_probes import LinuxProbes
 
 def run_as_admin():
     if not ctypes.windll.shell32.IsUserAnAdmin():
         ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, " ".join(sys.argv), None, 1)
         sys.exit()
 
-run_as_admin()
+if BACKEND == 'windows':
+    run_as_admin()
 
 # Configuration du logging
 logging.basicConfig(
@@ -34,6 +49,49 @@ API_URL = "http://localhost:5000/"
 HEADERS = {'Content-Type': 'application/json'}
 COLLECT_INTERVAL = 20
 TIMEOUT = 15
+# Délai maximal des sondes lentes (WMI, journal d'événements), exécutées en parallèle
+PROBE_TIMEOUT = float(os.environ.get('COLLECT_PROBE_TIMEOUT', 5))
+# Coût moyen / maximal des sondes journalisé tous les PROBE_REPORT_EVERY cycles
+PROBE_REPORT_EVERY = int(os.environ.get('COLLECT_PROBE_REPORT_EVERY', 15))
+
+# Volume dont l'occupation est mesurée
+DISK_PATH = os.environ.get('COLLECT_DISK_PATH', 'C:' if BACKEND == 'windows' else '/')
+# Sondes Linux: sortie de `smartctl -A [-j]` écrite par une tâche root, journal suivi,
+# capteur de température imposé (sinon choisi dans /sys/class/thermal et hwmon)
+SMART_FILE = os.environ.get('COLLECT_SMART_FILE')
+EVENT_LOG = os.environ.get('COLLECT_EVENT_LOG') or next(
+    (path for path in ('/var/log/syslog', '/var/log/messages') if os.path.exists(path)), None)
+TEMPERATURE_SENSOR = os.environ.get('COLLECT_TEMPERATURE_SENSOR')
+
+# Connexions WMI réutilisées d'un cycle à l'autre, lectures SMART mises en cache par cycle
+wmi_probe = WMIProbe() if BACKEND == 'windows' else None
+# Format d'envoi: 'json' (défaut) ou 'binary' (enregistrement compact, voir binary_protocol.py)
+PAYLOAD_FORMAT = os.environ.get('COLLECT_FORMAT', 'json')
+HOST_ID = socket.gethostname()
+
+# Échantillons en attente d'envoi, conservés sur disque (API arrêtée ou injoignable):
+# envoyés par lots de REPLAY_BATCH_SIZE via /predict/batch par un thread dédié
+SPOOL_DIR = os.environ.get('COLLECT_SPOOL_DIR', 'spool')
+SPOOL_MAX_BYTES = int(os.environ.get('COLLECT_SPOOL_MAX_BYTES', 16 * 1024 * 1024))
+SPOOL_FSYNC_EVERY = int(os.environ.get('COLLECT_SPOOL_FSYNC_EVERY', 10))
+REPLAY_BATCH_SIZE = 500
+# Envoi dès COLLECT_FLUSH_SAMPLES échantillons en attente, ou quand le plus ancien
+# attend depuis COLLECT_FLUSH_INTERVAL secondes (1 = chaque échantillon aussitôt)
+FLUSH_SAMPLES = int(os.environ.get('COLLECT_FLUSH_SAMPLES', 1))
+FLUSH_INTERVAL = float(os.environ.get('COLLECT_FLUSH_INTERVAL', 60))
+RETRY_MAX_DELAY = 300  # secondes
+# Refus signifiant des données invalides: seuls codes qui font abandonner des échantillons
+# (404, 401, 403, 413, 5xx... : mauvaise URL, proxy ou API incompatible, le spool garde tout)
+INVALID_PAYLOAD_STATUSES = (400, 422)
+RECORD = record_dtype(9)
+
+# Le collector n'utilise pas le détail des prédictions: réponse réduite au décompte
+BATCH_URL = API_URL.rstrip('/') + "/predict/batch?results=0"
+
+# Connexion HTTP persistante (keep-alive) réutilisée par tous les envois
+session = requests.Session()
+session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
+session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
 
 # Mapping des niveaux d'événements
 LEVEL_MAPPING = {
@@ -44,28 +102,31 @@ LEVEL_MAPPING = {
     'Audit Failure': 2
 }
 
-def get_system_metrics():
+def get_system_metrics(temperature=0):
+    """Mesures CPU / mémoire / disque instantanées; la température vient des sondes"""
     try:
-        metrics = {
-            'cpu_usage': psutil.cpu_percent(interval=1),
+        if BACKEND == 'linux':
+            return {**linux_probes.usage(), 'temperature': temperature}
+        return {
+            # Moyenne depuis l'appel précédent (cycle précédent), sans attente
+            'cpu_usage': psutil.cpu_percent(interval=None),
             'ram_usage': psutil.virtual_memory().percent,
-            'disk_usage': psutil.disk_usage('C:').percent,
-            'temperature': 0
+            'disk_usage': psutil.disk_usage(DISK_PATH).percent,
+            'temperature': temperature
         }
-
-        try:
-            w = wmi.WMI(namespace="root\\wmi")
-            temp_info = w.MSAcpi_ThermalZoneTemperature()
-            if temp_info:
-                metrics['temperature'] = (temp_info[0].CurrentTemperature - 2732) / 10.0
-        except Exception as e:
-            logging.warning(f"Température non lue: {e}")
-
-        return metrics
     except Exception as e:
         logging.error(f"Erreur métriques: {e}")
         return None
 
+def get_temperature():
+    try:
+        zones = wmi_probe.thermal_zones()
+        if zones:
+            return (zones[0] - 2732) / 10.0
+    except Exception as e:
+        logging.warning(f"Température non lue: {e}")
+    return 0
+
 def get_disk_health():
     health = {
         'reallocated_sectors': 0,
@@ -74,29 +135,35 @@ def get_disk_health():
     }
 
     try:
-        w = wmi.WMI(namespace="root\\wmi")
-        disks = w.MSStorageDriver_FailurePredictStatus()
-        if disks:
-            smart_data = w.MSStorageDriver_ATAPISmartData()
-            if smart_data:
+        if wmi_probe.failure_status():
+            blobs = list(wmi_probe.smart_blobs().values())
+            if blobs:
                 # Conversion IMMÉDIATE en int Python
                 health.update({
-                    'reallocated_sectors': int(int.from_bytes(smart_data[0].VendorSpecific[196:198], byteorder='little')),
-                    'read_errors': int(int.from_bytes(smart_data[0].VendorSpecific[200:202], byteorder='little')),
-                    'write_errors': int(int.from_bytes(smart_data[0].VendorSpecific[204:206], byteorder='little'))
+                    'reallocated_sectors': int.from_bytes(blobs[0][196:198], byteorder='little'),
+                    'read_errors': int.from_bytes(blobs[0][200:202], byteorder='little'),
+                    'write_errors': int.from_bytes(blobs[0][204:206], byteorder='little')
                 })
     except Exception as e:
         logging.warning(f"Erreur SMART: {e}")
 
     return health
 
+# Journal System ouvert une fois; rouvert après une erreur
+event_log = None
+
 def get_system_events():
+    global event_log
     event = {'event_id': 0, 'level': 'Information'}
 
     try:
-        hand = win32evtlog.OpenEventLog(None, "System")
-        flags = win32evtlog.EVENTLOG_BACKWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ
-        events = win32evtlog.ReadEventLog(hand, flags, 0, 1)
+        if event_log is None:
+            event_log = win32evtlog.OpenEventLog(None, "System")
+        # Lecture directe du dernier enregistrement, sans rouvrir le journal
+        newest = (win32evtlog.GetOldestEventLogRecord(event_log)
+                  + win32evtlog.GetNumberOfEventLogRecords(event_log) - 1)
+        flags = win32evtlog.EVENTLOG_BACKWARDS_READ | win32evtlog.EVENTLOG_SEEK_READ
+        events = win32evtlog.ReadEventLog(event_log, flags, newest, 1)
       
         if events:
             event_type = events[0].EventType
@@ -104,18 +171,55 @@ def get_system_events():
             event['event_id'] = int(events[0].EventID)  # Conversion explicite
     except Exception as e:
         logging.warning(f"Erreur événements: {e}")
+        if event_log is not None:
+            try:
+                win32evtlog.CloseEventLog(event_log)
+            except Exception:
+                pass
+            event_log = None
 
     return event
 
 
+def init_probe_thread():
+    # WMI (COM) doit être initialisé dans chaque thread qui l'utilise
+    pythoncom.CoInitialize()
+
+
+if BACKEND == 'linux':
+    linux_probes = LinuxProbes(DISK_PATH, SMART_FILE, EVENT_LOG, TEMPERATURE_SENSOR)
+    probe_functions = {
+        'temperature': linux_probes.temperature,
+        'disk': linux_probes.disk_health,
+        'event': linux_probes.system_event
+    }
+else:
+    probe_functions = {'temperature': get_temperature, 'disk': get_disk_health, 'event': get_system_events}
+
+# Sondes lentes exécutées en parallèle, bornées par PROBE_TIMEOUT
+probes = ProbeScheduler(
+    probe_functions,
+    defaults={
+        'temperature': 0,
+        'disk': {'reallocated_sectors': 0, 'read_errors': 0, 'write_errors': 0},
+        'event': {'event_id': 0, 'level': 'Information'}
+    },
+    timeout=PROBE_TIMEOUT,
+    initializer=init_probe_thread if BACKEND == 'windows' else None
+)
+
+
 def prepare_payload():
     try:
-        metrics = get_system_metrics()
+        if wmi_probe is not None:
+            wmi_probe.new_cycle()
+        results = probes.run()
+        metrics = get_system_metrics(results['temperature'])
         if not metrics:
             return None
 
-        disk = get_disk_health()
-        event = get_system_events()
+        disk = results['disk']
+        event = results['event']
 
         # Conversion en types natifs
         payload = {
@@ -144,50 +248,127 @@ def prepare_payload():
         return None
 
 
-def send_to_api(payload):
+def send_records(data):
+    """Envoie des enregistrements du spool en un lot; retourne (code HTTP ou None, Retry-After)"""
     try:
-        # Structure finale garantie
-        api_payload = {
-            "features": [float(x) for x in payload['features']],  # Conversion absolue en float
-            "timestamp": payload.get('timestamp', datetime.now().isoformat())
-        }
-        # Debug: vérification des types
-        types_check = [type(x) for x in api_payload['features']]
-        if any(t not in (int, float) for t in types_check):
-            logging.warning(f"Types non natifs détectés: {types_check}")
-            api_payload['features'] = [float(x) for x in api_payload['features']]
-
-        # Vérification de sécurité
-        if len(api_payload['features']) != 9:
-            raise ValueError("Nombre incorrect de features")
-
-        response = requests.post(
-            API_URL + "/predict",
-            json=api_payload,  # Utilisez 'json=' au lieu de 'data='
-            headers={'Content-Type': 'application/json'},
-            timeout=TIMEOUT
-        )
+        if PAYLOAD_FORMAT == 'binary':
+            # Les enregistrements du spool sont déjà au format binaire: seul l'en-tête est ajouté
+            response = session.post(
+                BATCH_URL,
+                data=frame_records(data),
+                headers={'Content-Type': BINARY_CONTENT_TYPE},
+                timeout=TIMEOUT
+            )
+        else:
+            records = np.frombuffer(data, dtype=RECORD)
+            response = session.post(
+                BATCH_URL,
+                json={
+                    # float32 sur disque: arrondi pour ne pas envoyer 12.300000190734863
+                    "features": np.round(records['features'].astype(np.float64), 4).tolist(),
+                    "timestamps": [datetime.fromtimestamp(ts).isoformat() for ts in records['timestamp'].tolist()],
+                    "host_ids": [host.decode('utf-8', 'replace') for host in records['host_id'].tolist()]
+                },
+                headers={'Content-Type': 'application/json'},
+                timeout=TIMEOUT
+            )
 
         if response.status_code == 200:
-            print('donnée bien envoyée au serveur')
-            return True
-        logging.error(f"Erreur API ({response.status_code}): {response.text}")
+            print(f'{len(data) // RECORD.itemsize} donnée(s) bien envoyée(s) au serveur')
+        elif response.status_code in (429, 503):
+            # Refus rapide de l'API (limite par machine ou surcharge)
+            logging.warning(f"API saturée ({response.status_code}), "
+                            f"nouvel essai dans {response.headers.get('Retry-After', '?')} s")
+        else:
+            logging.error(f"Erreur API ({response.status_code}): {response.text}")
+        return response.status_code, response.headers.get('Retry-After')
     except Exception as e:
         logging.error(f"ERREUR: {str(e)}")
-    return False
+    return None, None
+
+
+def forward_spool(spool, stop):
+    """Thread d'envoi: vide le spool vers l'API, avec attente croissante si elle est injoignable
+
+    Un lot refusé comme invalide (INVALID_PAYLOAD_STATUSES) est renvoyé par
+    moitiés: seuls les échantillons refusés un par un sont abandonnés.
+    """
+    delay = 1
+    batch_size = REPLAY_BATCH_SIZE
+    while not stop.is_set():
+        token, data = spool.peek(batch_size)
+        if not data:
+            spool.wait(COLLECT_INTERVAL)
+            continue
+
+        count = len(data) // RECORD.itemsize
+        if count < min(FLUSH_SAMPLES, batch_size):
+            # Lot incomplet: attendre d'autres échantillons tant que le plus ancien n'a pas FLUSH_INTERVAL s
+            oldest = float(np.frombuffer(data, dtype=RECORD, count=1)['timestamp'][0])
+            remaining = FLUSH_INTERVAL - (time.time() - oldest)
+            if remaining > 0:
+                spool.wait(remaining, FLUSH_SAMPLES)
+                continue
+        status, retry_after = send_records(data)
+        if status == 200:
+            spool.ack(token, count)
+            if delay > 1:
+                logging.info(f"API de nouveau joignable, {spool.pending()} échantillon(s) encore en attente")
+            delay = 1
+            # Moitié acceptée: reprise par lots complets (la bisection recommence au besoin)
+            batch_size = REPLAY_BATCH_SIZE
+            continue
+
+        if status in INVALID_PAYLOAD_STATUSES:
+            if count > 1:
+                # Isoler les lignes invalides sans perdre les autres
+                batch_size = max(1, count // 2)
+                logging.warning(f"Lot de {count} échantillons refusé ({status}), nouvel essai par lots de {batch_size}")
+            else:
+                # Refus définitif: ne bloque pas la file
+                logging.error(f"Échantillon rejeté par l'API ({status}), abandonné")
+                spool.ack(token, count)
+                batch_size = REPLAY_BATCH_SIZE
+            continue
+
+        wait = float(retry_after) if retry_after and retry_after.isdigit() else delay
+        delay = min(delay * 2, RETRY_MAX_DELAY)
+        logging.warning(f"Envoi reporté de {wait:.0f} s, {spool.pending()} échantillon(s) en attente sur disque")
+        stop.wait(wait)
 
 
 def main():
-    logging.info("Démarrage du collector...")
+    logging.info(f"Démarrage du collector (sondes {BACKEND})...")
+    # Référence pour la première mesure CPU (calculée par différence entre deux appels);
+    # LinuxProbes prend la sienne à la construction
+    if BACKEND == 'windows':
+        psutil.cpu_percent(interval=None)
+    spool = DiskSpool(SPOOL_DIR, RECORD.itemsize, SPOOL_MAX_BYTES, fsync_every=SPOOL_FSYNC_EVERY)
+    if spool.pending():
+        logging.info(f"{spool.pending()} échantillon(s) non envoyé(s) repris depuis {SPOOL_DIR}")
+    stop = threading.Event()
+    # La boucle de collecte ne fait qu'écrire sur disque; le réseau est dans ce thread
+    sender = threading.Thread(target=forward_spool, args=(spool, stop), name='forwarder', daemon=True)
+    sender.start()
    
+    cycles = 0
     try:
         while True:
             start_time = time.time()
             payload = prepare_payload()
+            cycles += 1
+            if cycles % PROBE_REPORT_EVERY == 0:
+                logging.info(f"Coût des sondes ({PROBE_REPORT_EVERY} cycles): {ProbeCosts.format(probes.costs.report())}")
+                if wmi_probe is not None:
+                    logging.info(f"Requêtes WMI: {ProbeCosts.format(wmi_probe.costs.report())}, "
+                                 f"{wmi_probe.reconnects} reconnexion(s) depuis le démarrage")
            
             if payload:
-                
-                send_to_api(payload)
+                epoch = datetime.fromisoformat(payload['timestamp']).timestamp()
+                evicted = spool.evicted
+                spool.append(encode_records([(HOST_ID, epoch, payload['features'])]))
+                if spool.evicted > evicted:
+                    logging.warning(f"Spool plein: {spool.evicted - evicted} échantillon(s) le(s) plus ancien(s) supprimé(s)")
            
             elapsed = time.time() - start_time
             sleep_time = max(0, COLLECT_INTERVAL - elapsed)
@@ -198,6 +379,11 @@ def main():
     except Exception as e:
         logging.error(f"Erreur inattendue: {e}")
     finally:
+        stop.set()
+        probes.shutdown()
+        if BACKEND == 'linux':
+            linux_probes.close()
+        spool.close()
         logging.info("Collector arrêté")
 
 if __name__ == '__main__':
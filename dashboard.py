@@ -3,9 +3,13 @@ from dash import dcc, html, Input, Output, State
 import pandas as pd
 import numpy as np
 import joblib
+import os
+from forest_engine import compile_model
 
 # Charger le modèle et l'encodeur
 model = joblib.load('ml_randomforest.pkl')
+if os.environ.get('MODEL_ENGINE', 'sklearn') == 'compiled':
+    model = compile_model(model)  # Forêt aplatie en tableaux NumPy
 label_encoder = joblib.load('label_encoder.pkl')  # Pour la target (11 classes)
 level_encoder = joblib.load('level_encoder.pkl')  # Pour la feature 'level' (3 classes)
 
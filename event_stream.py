@@ -0,0 +1,84 @@
+import json
+import queue
+import threading
+
+
+class EventBroker:
+    """Diffusion des nouvelles prédictions aux abonnés Server-Sent Events
+
+    Chaque abonné possède une file bornée; un abonné trop lent perd ses
+    événements les plus anciens au lieu de bloquer la publication. Un
+    événement est sérialisé une seule fois, quel que soit le nombre
+    d'abonnés.
+
+    Chaque abonné garde un thread de requête tant qu'il est connecté: au
+    plus `max_subscribers` abonnés (0 = sans limite), subscribe() retourne
+    None au-delà.
+
+    La diffusion est locale au processus: avec plusieurs workers (serve.py),
+    un abonné ne recevrait que les prédictions traitées par son worker.
+    """
+
+    def __init__(self, max_queue=100, heartbeat_s=15.0, max_subscribers=0):
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat_s
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, host_id=None):
+        """Nouvel abonné, optionnellement limité à une machine (None si le maximum est atteint)"""
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_subscribers and len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers[subscriber] = host_id
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.pop(subscriber, None)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, event, host_id=None):
+        """Envoie un événement (dict) à tous les abonnés concernés"""
+        with self._lock:
+            targets = [q for q, host in self._subscribers.items() if host is None or host == host_id]
+        if not targets:
+            return
+        message = f"data: {json.dumps(event)}\n\n"
+        for subscriber in targets:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Abonné trop lent: on sacrifie l'événement le plus ancien
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    pass
+
+    def stream(self, subscriber, initial=None):
+        """Générateur SSE pour un abonné (état initial, événements, keep-alive)"""
+        try:
+            if initial is not None:
+                yield f"data: {json.dumps(initial)}\n\n"
+            else:
+                # Premier envoi immédiat: les en-têtes partent avec lui (connexion ouverte côté client)
+                yield ": connecté\n\n"
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Commentaire SSE: garde la connexion ouverte sans réveiller le client
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def __len__(self):
+        return len(self._subscribers)
@@ -0,0 +1,180 @@
+import os
+
+import joblib
+import numpy as np
+
+# Marqueur de feuille utilisé par sklearn dans tree_.children_left
+TREE_LEAF = -1
+# Lignes parcourues ensemble: les tableaux intermédiaires (arbres x lignes) restent en cache
+CHUNK_ROWS = 256
+# Au-delà, le parcours vectorisé coûte plus que celui de sklearn (Cython, profondeur réelle
+# de chaque ligne): la forêt d'origine est utilisée si elle est disponible (`fallback`)
+FALLBACK_ROWS = 256
+
+# Champs sauvegardés par CompiledForest.save
+ENGINE_KEYS = (
+    'feature', 'threshold', 'children_left', 'children_right', 'leaf_values',
+    'roots', 'max_depth', 'classes', 'feature_names',
+)
+
+
+class CompiledForest:
+    """Forêt aléatoire aplatie dans des tableaux NumPy contigus
+
+    Tous les arbres d'un RandomForestClassifier entraîné sont concaténés
+    dans les mêmes tableaux (feature, seuil, enfants, distributions des
+    feuilles). Un lot est évalué pour tous les arbres à la fois par un
+    parcours vectorisé, sans la validation d'entrée ni la boucle Python
+    par estimateur de sklearn.
+
+    Le parcours se fait par tranches de CHUNK_ROWS lignes et ne fait
+    avancer que les chemins qui n'ont pas atteint une feuille. Au-delà de
+    FALLBACK_ROWS lignes, `fallback` (la forêt sklearn, quand elle est
+    chargée) évalue le lot.
+    """
+
+    def __init__(self, feature, threshold, children_left, children_right,
+                 leaf_values, roots, max_depth, classes, feature_names=None, fallback=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.feature_names_in_ = feature_names
+        self.n_estimators = len(roots)
+        self.fallback = fallback
+        # Les feuilles pointent sur elles-mêmes (voir from_sklearn)
+        self._is_leaf = np.asarray(children_left) == np.arange(len(children_left))
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Construit le moteur à partir d'un RandomForestClassifier entraîné"""
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("Seules les forêts mono-sortie sont supportées")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            left = tree.children_left.astype(np.intp)
+            right = tree.children_right.astype(np.intp)
+            is_leaf = left == TREE_LEAF
+            node_ids = np.arange(n_nodes, dtype=np.intp)
+
+            # Les feuilles pointent sur elles-mêmes: le parcours devient idempotent
+            lefts.append(np.where(is_leaf, node_ids, left) + offset)
+            rights.append(np.where(is_leaf, node_ids, right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(tree.threshold.astype(np.float64))
+
+            # Distribution normalisée par noeud, comme tree.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            values.append(value / totals)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            children_left=np.ascontiguousarray(np.concatenate(lefts)),
+            children_right=np.ascontiguousarray(np.concatenate(rights)),
+            leaf_values=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+            feature_names=getattr(forest, 'feature_names_in_', None),
+            fallback=forest,
+        )
+
+    def to_arrays(self):
+        """Tableaux et paramètres du moteur, pour la sérialisation"""
+        values = (self.feature, self.threshold, self.children_left, self.children_right,
+                  self.leaf_values, self.roots, self.max_depth, self.classes_,
+                  self.feature_names_in_)
+        return dict(zip(ENGINE_KEYS, values))
+
+    def save(self, path, **extra):
+        """Sauvegarde non compressée, rechargeable en mémoire mappée"""
+        joblib.dump({**self.to_arrays(), **extra}, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Recharge un moteur sauvegardé; retourne (moteur, données supplémentaires)
+
+        Avec mmap_mode='r' les tableaux restent dans le cache de pages du
+        système et sont partagés entre processus au lieu d'être copiés.
+        """
+        data = joblib.load(path, mmap_mode=mmap_mode)
+        arrays = {key: data.pop(key) for key in ENGINE_KEYS}
+        return cls(**arrays), data
+
+    def _as_array(self, X):
+        """Convertit l'entrée en float32, comme sklearn avant le parcours des arbres"""
+        if self.feature_names_in_ is not None and hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X
+
+    def _apply_chunk(self, X):
+        """Feuilles atteintes par les lignes de X (float32), forme (n_arbres, n_lignes)"""
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, self.n_estimators)
+        nodes = np.repeat(self.roots, n_rows)
+        # Chemins (arbre, ligne) encore en cours
+        active = np.flatnonzero(~self._is_leaf.take(nodes))
+        while active.size:
+            current = nodes.take(active)
+            go_left = flat_X.take(row_offsets.take(active) + self.feature.take(current)) <= self.threshold.take(current)
+            next_nodes = np.where(go_left, self.children_left.take(current), self.children_right.take(current))
+            nodes[active] = next_nodes
+            active = active[~self._is_leaf.take(next_nodes)]
+        return nodes.reshape(self.n_estimators, n_rows)
+
+    def apply(self, X):
+        """Indices (globaux) des feuilles atteintes, forme (n_arbres, n_lignes)"""
+        X = self._as_array(X)
+        return np.concatenate(
+            [self._apply_chunk(X[start:start + CHUNK_ROWS]) for start in range(0, len(X), CHUNK_ROWS)], axis=1)
+
+    def predict_proba(self, X):
+        """Moyenne des distributions des feuilles sur tous les arbres"""
+        if self.fallback is not None and len(X) > FALLBACK_ROWS:
+            return self.fallback.predict_proba(X)
+        X = self._as_array(X)
+        probabilities = np.empty((len(X), self.leaf_values.shape[1]))
+        for start in range(0, len(X), CHUNK_ROWS):
+            leaves = self._apply_chunk(X[start:start + CHUNK_ROWS])
+            probabilities[start:start + CHUNK_ROWS] = self.leaf_values.take(leaves, axis=0).mean(axis=0)
+        return probabilities
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_model(model):
+    """Retourne la version compilée du modèle si c'est une forêt aléatoire sklearn"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    if isinstance(model, RandomForestClassifier) and hasattr(model, 'estimators_'):
+        return CompiledForest.from_sklearn(model)
+    raise TypeError(f"Moteur compilé non disponible pour {type(model).__name__}")
+
+
+def cache_is_fresh(cache_path, *sources):
+    """Vrai si le cache existe et est plus récent que tous ses fichiers sources"""
+    if not os.path.exists(cache_path):
+        return False
+    cache_mtime = os.path.getmtime(cache_path)
+    return all(os.path.getmtime(src) <= cache_mtime for src in sources if os.path.exists(src))
@@ -0,0 +1,183 @@
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from process_thread import ProcessThread
+
+# Nom de colonne SQL admis pour une feature
+COLUMN_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class PredictionHistory:
+    """Historique persistant des prédictions (SQLite en mode WAL)
+
+    Une ligne par prédiction: machine, horodatage epoch, label, confiance
+    et une colonne REAL par feature, avec un index (host, ts). Les requêtes
+    ne font que déposer la ligne dans une file bornée (put_nowait, lignes
+    abandonnées et comptées si la file est pleine); un thread d'écriture
+    les insère par lots, une transaction par lot (`batch_size` lignes ou
+    `flush_interval` secondes). Les lectures passent par une connexion par
+    thread et ne bloquent pas l'écriture (WAL).
+
+    Comme MicroBatcher, le thread d'écriture démarre au premier append() de
+    chaque processus; plusieurs workers peuvent écrire dans le même fichier.
+    """
+
+    def __init__(self, path, feature_columns, batch_size=500, flush_interval=1.0,
+                 max_queue=10000, retention_days=0):
+        for column in feature_columns:
+            if not COLUMN_PATTERN.match(column):
+                raise ValueError(f"Nom de feature inutilisable comme colonne: {column!r}")
+        self.path = path
+        self.feature_columns = list(feature_columns)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.retention = retention_days * 86400
+        self._worker = ProcessThread(self._run, 'history-writer', setup=self._setup)
+        self._queue = None
+        self._local = threading.local()
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+        columns = ', '.join(f'{name} REAL' for name in self.feature_columns)
+        placeholders = ', '.join('?' * (4 + len(self.feature_columns)))
+        self._insert = f'INSERT INTO predictions VALUES ({placeholders})'
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS predictions '
+                    f'(host TEXT NOT NULL, ts REAL NOT NULL, label TEXT, confidence REAL, {columns})'
+                )
+                connection.execute('CREATE INDEX IF NOT EXISTS predictions_host_ts ON predictions (host, ts)')
+        finally:
+            connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # En WAL, NORMAL ne synchronise qu'aux checkpoints: un lot peut être
+        # perdu en cas de coupure, jamais la cohérence du fichier
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _setup(self):
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._local = threading.local()
+
+    def append(self, host, timestamp, label, confidence, features):
+        """Dépose une prédiction pour écriture; ne bloque jamais"""
+        self._worker.ensure_started()
+        row = (host, timestamp, label, confidence, *map(float, features))
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _collect(self):
+        """Lignes reçues pendant flush_interval, jusqu'à batch_size"""
+        rows = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                rows.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self):
+        connection = self._connect()
+        next_purge = time.monotonic()
+        while True:
+            rows = self._collect()
+            try:
+                with connection:
+                    connection.executemany(self._insert, rows)
+                self.written += len(rows)
+            except sqlite3.Error:
+                self.errors += len(rows)
+                continue
+            if self.retention and time.monotonic() >= next_purge:
+                next_purge = time.monotonic() + 3600
+                try:
+                    with connection:
+                        connection.execute('DELETE FROM predictions WHERE ts < ?', (time.time() - self.retention,))
+                except sqlite3.Error:
+                    pass
+
+    def _reader(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def query(self, host, start, end, step=0.0, max_points=1000):
+        """Historique d'une machine entre deux epochs, du plus ancien au plus récent
+
+        Avec step > 0, les lignes sont regroupées par intervalles de `step`
+        secondes: moyennes de la confiance et des features, nombre de
+        prédictions par label et label majoritaire. Sans step, les lignes
+        brutes sont renvoyées si elles sont au plus `max_points`, sinon le
+        pas est choisi pour ne pas dépasser `max_points` intervalles.
+        """
+        connection = self._reader()
+        if step <= 0:
+            count = connection.execute(
+                'SELECT COUNT(*) FROM predictions WHERE host = ? AND ts >= ? AND ts < ?',
+                (host, start, end)).fetchone()[0]
+            if count <= max_points:
+                rows = connection.execute(
+                    f'SELECT ts, label, confidence, {", ".join(self.feature_columns)} FROM predictions '
+                    'WHERE host = ? AND ts >= ? AND ts < ? ORDER BY ts', (host, start, end)).fetchall()
+                return {
+                    'host_id': host, 'step': 0,
+                    'timestamps': [row[0] for row in rows],
+                    'predictions': [row[1] for row in rows],
+                    'confidences': [row[2] for row in rows],
+                    'features': [list(row[3:]) for row in rows]
+                }
+            step = (end - start) / max_points
+
+        # Une ligne par (intervalle, label): sommes, fusionnées ensuite par intervalle
+        sums = ', '.join(f'SUM({name})' for name in self.feature_columns)
+        rows = connection.execute(
+            f'SELECT CAST((ts - ?) / ? AS INTEGER) AS bucket, label, COUNT(*), SUM(confidence), {sums} '
+            'FROM predictions WHERE host = ? AND ts >= ? AND ts < ? GROUP BY bucket, label ORDER BY bucket',
+            (start, step, host, start, end)).fetchall()
+
+        buckets = {}
+        for bucket, label, count, confidence, *features in rows:
+            entry = buckets.get(bucket)
+            if entry is None:
+                entry = buckets[bucket] = [0, 0.0, [0.0] * len(features), {}]
+            entry[0] += count
+            entry[1] += confidence or 0.0
+            entry[2] = [total + (value or 0.0) for total, value in zip(entry[2], features)]
+            entry[3][label] = count
+
+        result = {'host_id': host, 'step': step, 'timestamps': [], 'counts': [], 'predictions': [],
+                  'labels': [], 'confidences': [], 'features': []}
+        for bucket, (count, confidence, features, labels) in buckets.items():
+            result['timestamps'].append(start + bucket * step)
+            result['counts'].append(count)
+            result['predictions'].append(max(labels, key=labels.get))
+            result['labels'].append(labels)
+            result['confidences'].append(round(confidence / count, 2))
+            result['features'].append([round(total / count, 3) for total in features])
+        return result
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'written': self.written,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queue_depth': self._queue.qsize() if self._worker.running() else 0
+        }
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+
+def to_epoch(timestamp):
+    """Horodatage ISO (ou epoch) -> secondes epoch; heure courante si illisible"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+class HostState:
+    """Dernière prédiction d'une machine et tampon circulaire de son historique"""
+
+    __slots__ = ('latest', 'updated_at', 'timestamps', 'labels', 'confidences',
+                 'features', 'position', 'count', 'revision')
+
+    def __init__(self, history_size, n_features):
+        self.latest = None
+        self.updated_at = 0.0
+        self.timestamps = np.zeros(history_size, dtype=np.float64)
+        self.labels = np.zeros(history_size, dtype=np.int16)
+        self.confidences = np.zeros(history_size, dtype=np.float32)
+        self.features = np.zeros((history_size, n_features), dtype=np.float32)
+        self.position = 0
+        self.count = 0
+        self.revision = 0
+
+
+class HostStateStore:
+    """État courant par machine, en mémoire
+
+    Mise à jour et lecture en O(1): un OrderedDict host_id -> HostState,
+    et pour chaque machine des tableaux de taille fixe écrits en tampon
+    circulaire (horodatage, code de label, confiance, features en float32).
+
+    Les identifiants viennent des clients: au-delà de `max_hosts` machines,
+    la moins récemment mise à jour est oubliée (comptée dans `evicted`) et
+    ses tableaux servent à la nouvelle.
+    """
+
+    def __init__(self, history_size=120, n_features=9, max_hosts=1000):
+        self.history_size = history_size
+        self.n_features = n_features
+        self.max_hosts = max_hosts
+        self._hosts = OrderedDict()
+        self.evicted = 0
+        self._last_host = None
+        self._label_codes = {}
+        self._label_names = []
+        self._lock = threading.Lock()
+        # Incrémenté à chaque mise à jour (ETag de /api/status)
+        self.revision = 0
+
+    def _label_code(self, label):
+        code = self._label_codes.get(label)
+        if code is None:
+            code = self._label_codes[label] = len(self._label_names)
+            self._label_names.append(label)
+        return code
+
+    def _new_state(self):
+        if len(self._hosts) < self.max_hosts:
+            return HostState(self.history_size, self.n_features)
+        # Machine la moins récemment active: ses tableaux sont réutilisés
+        _, state = self._hosts.popitem(last=False)
+        self.evicted += 1
+        state.position = state.count = 0
+        return state
+
+    def update(self, host_id, prediction, features):
+        """Enregistre une prédiction (dict de réponse) et la ligne de features associée"""
+        with self._lock:
+            state = self._hosts.get(host_id)
+            if state is None:
+                state = self._hosts[host_id] = self._new_state()
+            else:
+                self._hosts.move_to_end(host_id)
+            i = state.position
+            state.timestamps[i] = to_epoch(prediction.get('timestamp'))
+            state.labels[i] = self._label_code(prediction['prediction'])
+            state.confidences[i] = prediction['confidence']
+            state.features[i] = features
+            state.position = (i + 1) % self.history_size
+            state.count = min(state.count + 1, self.history_size)
+            state.latest = prediction
+            state.updated_at = time.time()
+            self.revision += 1
+            state.revision = self.revision
+            self._last_host = host_id
+
+    def latest(self, host_id=None):
+        """Dernière prédiction d'une machine, ou de la dernière machine active"""
+        with self._lock:
+            if host_id is None:
+                host_id = self._last_host
+            state = self._hosts.get(host_id)
+            return state.latest if state is not None else None
+
+    def latest_revision(self, host_id=None):
+        """Numéro de mise à jour de la dernière prédiction renvoyée par latest(host_id)"""
+        with self._lock:
+            if host_id is None:
+                return self.revision
+            state = self._hosts.get(host_id)
+            return state.revision if state is not None else 0
+
+    def history(self, host_id):
+        """Historique récent d'une machine, du plus ancien au plus récent"""
+        with self._lock:
+            state = self._hosts.get(host_id)
+            if state is None:
+                return None
+            start = (state.position - state.count) % self.history_size
+            order = (start + np.arange(state.count)) % self.history_size
+            return {
+                'host_id': host_id,
+                'timestamps': state.timestamps[order].tolist(),
+                'predictions': [self._label_names[code] for code in state.labels[order].tolist()],
+                # Arrondi: les valeurs sont stockées en float32
+                'confidences': np.round(state.confidences[order].astype(np.float64), 2).tolist(),
+                'features': np.round(state.features[order].astype(np.float64), 3).tolist()
+            }
+
+    def hosts(self):
+        """Résumé de toutes les machines connues"""
+        with self._lock:
+            return [
+                {
+                    'host_id': host_id,
+                    'prediction': state.latest['prediction'],
+                    'confidence': state.latest['confidence'],
+                    'timestamp': state.latest.get('timestamp'),
+                    'samples': state.count
+                }
+                for host_id, state in self._hosts.items()
+            ]
+
+    def __len__(self):
+        return len(self._hosts)
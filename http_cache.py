@@ -0,0 +1,60 @@
+import gzip
+import os
+import uuid
+import zlib
+
+# Types de contenu qui gagnent à être compressés
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+_process_tag = (None, None)
+
+
+def process_tag():
+    """Identifiant propre au processus courant (régénéré après un fork)
+
+    Les compteurs d'état diffèrent d'un worker à l'autre: il entre dans
+    les ETags qui en dérivent pour qu'un worker ne valide jamais la
+    réponse d'un autre.
+    """
+    global _process_tag
+    pid, tag = _process_tag
+    if pid != os.getpid():
+        pid, tag = _process_tag = (os.getpid(), uuid.uuid4().hex[:8])
+    return tag
+
+
+def state_etag(*parts):
+    """Valeur d'ETag dérivée de l'état (sans sérialiser la réponse), à poser en ETag faible"""
+    return '-'.join(str(part) for part in (process_tag(),) + parts)
+
+
+def compress_response(response, accept_encodings, min_size=1024, level=5):
+    """Compresse le corps en gzip ou deflate selon Accept-Encoding, au-delà de min_size octets
+
+    Les flux (SSE), les réponses déjà encodées et les types non textuels
+    sont laissés tels quels. Retourne la réponse (modifiée sur place).
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accept_encodings.best_match(('gzip', 'deflate'))
+    if encoding is None:
+        return response
+
+    if encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=level, mtime=0)
+    else:
+        data = zlib.compress(data, level)
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    # Même représentation sous un autre encodage: l'ETag devient faible
+    if response.headers.get('ETag', '').startswith('"'):
+        response.headers['ETag'] = 'W/' + response.headers['ETag']
+    return response
@@ -0,0 +1,44 @@
+import warnings
+
+import numpy as np
+
+from model_registry import class_name
+
+# Les lignes arrivent en tableaux NumPy déjà ordonnés: l'avertissement de
+# sklearn sur l'absence de noms de colonnes n'est pas pertinent ici
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+
+class InferenceEngine:
+    """Couche d'inférence: un seul parcours du modèle par prédiction
+
+    Les probabilités sont calculées une seule fois, la classe prédite et la
+    confiance en sont déduites (argmax), et le décodage des labels passe par
+    une table d'index précalculée au lieu de label_encoder.inverse_transform.
+
+    Les codes numériques de l'encodeur (0..11) sont traduits ici en noms de
+    classes (model_registry.class_name): quel que soit le moteur, les labels
+    retournés sont les mêmes noms.
+    """
+
+    def __init__(self, model, label_encoder):
+        self.model = model
+        self.class_names = np.array([class_name(c) for c in label_encoder.classes_], dtype=object)
+
+        # Table colonne de predict_proba -> nom de classe
+        model_classes = getattr(model, 'classes_', None)
+        if model_classes is None:
+            self.label_table = self.class_names
+        else:
+            self.label_table = self.class_names[np.asarray(model_classes, dtype=np.intp)]
+
+    def predict_proba(self, X):
+        """Probabilités brutes, forme (n_lignes, n_classes)"""
+        return np.asarray(self.model.predict_proba(X), dtype=np.float64)
+
+    def predict(self, X):
+        """Retourne (labels, confiances, probabilités) pour un lot de lignes"""
+        probabilities = self.predict_proba(X)
+        best = np.argmax(probabilities, axis=1)
+        confidences = probabilities[np.arange(len(best)), best]
+        return self.label_table[best], confidences, probabilities
@@ -0,0 +1,249 @@
+import glob
+import json
+import logging
+import os
+import re
+
+# Capteurs de température préférés, dans l'ordre: zone ACPI (comme
+# MSAcpi_ThermalZoneTemperature sous Windows), puis sondes du processeur
+THERMAL_ZONE_TYPES = ('acpitz',)
+HWMON_NAMES = ('coretemp', 'k10temp', 'zenpower', 'cpu_thermal', 'soc_thermal')
+
+# Attributs SMART (ATA) retenus pour les trois features disque
+SMART_ATTRIBUTES = {
+    'reallocated_sectors': (5, 196),    # Reallocated_Sector_Ct, sinon Reallocated_Event_Count
+    'read_errors': (187, 197),          # Reported_Uncorrect, sinon Current_Pending_Sector
+    'write_errors': (200,),             # Multi_Zone_Error_Rate (Write_Error_Rate)
+}
+# Ligne de tableau de `smartctl -A`: ID# ATTRIBUTE_NAME FLAG VALUE WORST THRESH TYPE UPDATED WHEN_FAILED RAW_VALUE
+SMART_TEXT_LINE = re.compile(r'^\s*(\d+)\s+\S+\s+0x[0-9a-fA-F]+(?:\s+\S+){6}\s+(\d+)')
+
+# Mots-clés d'une ligne syslog texte (pas de priorité dans le fichier)
+ERROR_WORDS = re.compile(r'\b(error|err|fail(ed|ure)?|critical|crit|panic|fatal)\b', re.IGNORECASE)
+WARNING_WORDS = re.compile(r'\b(warn(ing)?|timeout|timed out)\b', re.IGNORECASE)
+LEVEL_RANK = {'Information': 0, 'Warning': 1, 'Error': 2}
+
+
+class ProcFile:
+    """Fichier de /proc ou /sys ouvert une fois et relu en place (pread à l'offset 0)"""
+
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.size = size
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self):
+        while True:
+            data = os.pread(self.fd, self.size, 0)
+            if len(data) < self.size:
+                return data.decode('ascii', 'replace')
+            self.size *= 2
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LinuxProbes:
+    """Sondes du collector sous Linux, sans wmi ni win32evtlog
+
+    Produit les mêmes grandeurs que les sondes Windows de collect.py, donc
+    le même vecteur de 9 features:
+
+    - CPU (/proc/stat, différence entre deux cycles), mémoire
+      (/proc/meminfo, MemAvailable) et occupation du disque (statvfs)
+    - température: zone thermique ACPI, sinon capteur hwmon du processeur
+      (/sys/class/thermal, /sys/class/hwmon)
+    - SMART: fichier de sortie de `smartctl -A` (texte) ou `smartctl -A -j`
+      (JSON) produit par une tâche planifiée avec les droits root; relu
+      seulement quand il change
+    - événements: lignes ajoutées depuis le cycle précédent à un fichier
+      syslog, ou à un export `journalctl -o json`; le plus grave est
+      retenu. Linux n'a pas d'identifiants d'événements comparables à ceux
+      de Windows: event_id vaut 0
+
+    Les fichiers de /proc et /sys sont ouverts une seule fois.
+    """
+
+    def __init__(self, disk_path='/', smart_file=None, event_file=None, temperature_sensor=None):
+        self.disk_path = disk_path
+        self.smart_file = smart_file
+        self.event_file = event_file
+        self._stat = ProcFile('/proc/stat')
+        self._meminfo = ProcFile('/proc/meminfo')
+        self._previous_cpu = self._cpu_times()
+        self._sensor = self._open_sensor(temperature_sensor)
+        self._smart_mtime = None
+        self._smart = {'reallocated_sectors': 0, 'read_errors': 0, 'write_errors': 0}
+        self._events = None
+        self._events_inode = None
+
+    # --- CPU, mémoire, disque
+
+    def _cpu_times(self):
+        fields = self._stat.read().split('\n', 1)[0].split()[1:]
+        times = [int(value) for value in fields]
+        # idle + iowait comptent comme inactifs (comme psutil)
+        idle = times[3] + (times[4] if len(times) > 4 else 0)
+        # guest et guest_nice sont déjà inclus dans user et nice
+        return sum(times[:8]), idle
+
+    def cpu_usage(self):
+        """Occupation CPU (%) depuis l'appel précédent, sans attente"""
+        total, idle = self._cpu_times()
+        previous_total, previous_idle = self._previous_cpu
+        self._previous_cpu = (total, idle)
+        elapsed = total - previous_total
+        if elapsed <= 0:
+            return 0.0
+        return round(100.0 * (1.0 - (idle - previous_idle) / elapsed), 1)
+
+    def ram_usage(self):
+        values = {}
+        for line in self._meminfo.read().splitlines():
+            name, _, rest = line.partition(':')
+            if name in ('MemTotal', 'MemAvailable'):
+                values[name] = int(rest.split()[0])
+        return round(100.0 * (values['MemTotal'] - values['MemAvailable']) / values['MemTotal'], 1)
+
+    def disk_usage(self):
+        stats = os.statvfs(self.disk_path)
+        used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+        available = stats.f_bavail * stats.f_frsize
+        return round(100.0 * used / (used + available), 1) if used + available else 0.0
+
+    def usage(self):
+        return {'cpu_usage': self.cpu_usage(), 'ram_usage': self.ram_usage(), 'disk_usage': self.disk_usage()}
+
+    # --- Température
+
+    def _open_sensor(self, path):
+        if path is None:
+            path = self._find_sensor()
+        if path is None:
+            logging.warning("Aucun capteur de température trouvé dans /sys/class/thermal ou /sys/class/hwmon")
+            return None
+        logging.info(f"Capteur de température: {path}")
+        return ProcFile(path, 64)
+
+    @staticmethod
+    def _find_sensor():
+        def read(path):
+            try:
+                with open(path) as f:
+                    return f.read().strip()
+            except OSError:
+                return ''
+
+        zones = sorted(glob.glob('/sys/class/thermal/thermal_zone*'))
+        for zone in zones:
+            if read(os.path.join(zone, 'type')) in THERMAL_ZONE_TYPES:
+                return os.path.join(zone, 'temp')
+        hwmons = sorted(glob.glob('/sys/class/hwmon/hwmon*'))
+        for name in HWMON_NAMES:
+            for hwmon in hwmons:
+                if read(os.path.join(hwmon, 'name')) == name and os.path.exists(os.path.join(hwmon, 'temp1_input')):
+                    return os.path.join(hwmon, 'temp1_input')
+        for zone in zones:
+            if os.path.exists(os.path.join(zone, 'temp')):
+                return os.path.join(zone, 'temp')
+        return None
+
+    def temperature(self):
+        """Température (°C) du capteur retenu, 0 sans capteur"""
+        if self._sensor is None:
+            return 0
+        return int(self._sensor.read().strip()) / 1000.0
+
+    # --- SMART
+
+    @staticmethod
+    def parse_smart(text):
+        """{id d'attribut: valeur brute} depuis `smartctl -A` en texte ou en JSON"""
+        text = text.strip()
+        if text.startswith('{'):
+            document = json.loads(text)
+            table = document.get('ata_smart_attributes', {}).get('table', [])
+            attributes = {row['id']: int(row.get('raw', {}).get('value', 0)) for row in table}
+            nvme = document.get('nvme_smart_health_information_log')
+            if nvme and not attributes:
+                # NVMe: pas d'attributs ATA; erreurs média comme erreurs de lecture
+                attributes[187] = int(nvme.get('media_errors', 0))
+            return attributes
+        attributes = {}
+        for line in text.splitlines():
+            match = SMART_TEXT_LINE.match(line)
+            if match:
+                attributes[int(match.group(1))] = int(match.group(2))
+        return attributes
+
+    def disk_health(self):
+        """Features disque depuis le dernier fichier smartctl (relu seulement s'il a changé)"""
+        if not self.smart_file:
+            return dict(self._smart)
+        try:
+            mtime = os.stat(self.smart_file).st_mtime_ns
+        except OSError as e:
+            logging.warning(f"Fichier SMART illisible: {e}")
+            return dict(self._smart)
+        if mtime != self._smart_mtime:
+            with open(self.smart_file, encoding='utf-8', errors='replace') as f:
+                attributes = self.parse_smart(f.read())
+            for feature, ids in SMART_ATTRIBUTES.items():
+                self._smart[feature] = next((attributes[i] for i in ids if i in attributes), 0)
+            self._smart_mtime = mtime
+        return dict(self._smart)
+
+    # --- Événements
+
+    def _open_events(self):
+        self._events = open(self.event_file, 'rb')
+        self._events_inode = os.fstat(self._events.fileno()).st_ino
+        # Seules les lignes écrites après le démarrage comptent
+        self._events.seek(0, os.SEEK_END)
+
+    @staticmethod
+    def event_level(line):
+        """Niveau ('Error', 'Warning', 'Information') d'une ligne syslog ou journal JSON"""
+        if line.startswith('{'):
+            try:
+                priority = int(json.loads(line).get('PRIORITY', 6))
+            except (ValueError, TypeError):
+                priority = 6
+            return 'Error' if priority <= 3 else 'Warning' if priority == 4 else 'Information'
+        if ERROR_WORDS.search(line):
+            return 'Error'
+        if WARNING_WORDS.search(line):
+            return 'Warning'
+        return 'Information'
+
+    def system_event(self):
+        """Événement le plus grave ajouté au journal depuis l'appel précédent"""
+        event = {'event_id': 0, 'level': 'Information'}
+        if not self.event_file:
+            return event
+        if self._events is None:
+            self._open_events()
+            return event
+
+        # Rotation (logrotate): nouveau fichier à la même place, ou fichier tronqué
+        try:
+            stat = os.stat(self.event_file)
+        except OSError:
+            return event
+        if stat.st_ino != self._events_inode or stat.st_size < self._events.tell():
+            self._events.close()
+            self._events = open(self.event_file, 'rb')
+            self._events_inode = os.fstat(self._events.fileno()).st_ino
+
+        for raw in self._events.readlines():
+            level = self.event_level(raw.decode('utf-8', 'replace'))
+            if LEVEL_RANK[level] >= LEVEL_RANK[event['level']]:
+                event['level'] = level
+        return event
+
+    def close(self):
+        for handle in (self._stat, self._meminfo, self._sensor):
+            if handle is not None:
+                handle.close()
+        if self._events is not None:
+            self._events.close()
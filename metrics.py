@@ -0,0 +1,144 @@
+import threading
+from bisect import bisect_left
+
+# Bornes (secondes) des histogrammes de latence: de 50 µs à 2,5 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Compteur monotone, une série par combinaison de labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, format_labels(self.label_names, values), count) for values, count in items]
+
+
+class Histogram:
+    """Histogramme à bornes fixes (cumulatives à l'export, comme Prometheus)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Par série: [comptes par case (+ case infinie), somme, nombre]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(values, list(counts), total, n) for values, (counts, total, n) in self._series.items()]
+        samples = []
+        for values, counts, total, n in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = format_labels(self.label_names + ('le',), values + (format_value(bound),))
+                samples.append((f'{self.name}_bucket', labels, cumulative))
+            labels = format_labels(self.label_names, values)
+            samples.append((f'{self.name}_sum', labels, total))
+            samples.append((f'{self.name}_count', labels, n))
+        return samples
+
+
+class Callback:
+    """Valeur lue au moment de l'export: nombre, dict {valeurs de labels: nombre} ou None"""
+
+    def __init__(self, name, documentation, func, kind='gauge', label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.kind = kind
+        self.label_names = tuple(label_names)
+
+    def samples(self):
+        value = self.func()
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [
+            (self.name, format_labels(self.label_names, values if isinstance(values, tuple) else (values,)), v)
+            for values, v in value.items()
+        ]
+
+
+class MetricsRegistry:
+    """Ensemble de métriques exportées au format texte Prometheus
+
+    Les valeurs sont propres au processus: avec plusieurs workers
+    (serve.py), chaque collecte ne voit que le worker qui y répond.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self.register(Counter(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def callback(self, name, documentation, func, kind='gauge', label_names=()):
+        return self.register(Callback(name, documentation, func, kind, label_names))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from process_thread import ProcessThread
+
+# Marqueur de fin de file déposé par close()
+_STOP = object()
+
+
+class MicroBatcher:
+    """File d'inférence en micro-lots partagée par les requêtes concurrentes
+
+    Chaque appel à submit() dépose une ligne de features dans la file et
+    reçoit un Future. Un thread unique regroupe les lignes pendant au plus
+    `max_wait_ms` millisecondes ou jusqu'à `max_batch_size` lignes, évalue
+    le lot en un seul appel à `predict_fn`, puis rend à chaque appelant sa
+    ligne de résultat.
+
+    Le thread est démarré au premier submit() de chaque processus, ce qui
+    permet de créer la file avant un fork (serve.py, preload_app). Après
+    close(), les lignes déjà en file sont traitées puis le thread s'arrête;
+    les appels suivants sont évalués directement dans le thread appelant.
+
+    `predict_fn(X)` reçoit un tableau (n, n_features) et retourne
+    (labels, confidences, probabilities) comme InferenceEngine.predict.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0,
+                 stats_window=10000, throughput_window_s=60.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._worker = ProcessThread(self._run, 'microbatch', setup=self._setup)
+        self._queue = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=stats_window)
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._batch_times = deque(maxlen=stats_window)
+        self._completed = 0
+        self._closed = False
+        self._stopping = False
+        self._submit_lock = threading.Lock()
+        self.throughput_window = throughput_window_s
+
+    def _setup(self):
+        # Après un fork, la file et le verrou du parent ne sont plus utilisables
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def submit(self, row):
+        """Dépose une ligne de features, retourne un Future (label, probabilités)"""
+        future = Future()
+        with self._submit_lock:
+            if not self._closed:
+                self._worker.ensure_started()
+                self._queue.put((row, future, time.perf_counter()))
+                return future
+        try:
+            labels, _, probabilities = self.predict_fn(row.reshape(1, -1))
+            future.set_result((labels[0], probabilities[0]))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        """Arrête le thread une fois la file vidée (remplacement du modèle)"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._worker.running():
+                self._queue.put(_STOP)
+
+    def predict_one(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._worker.running() else 0
+
+    def _collect(self):
+        """Attend une première ligne puis remplit le lot jusqu'à l'échéance"""
+        batch = []
+        item = self._queue.get()
+        deadline = time.perf_counter() + self.max_wait
+        while item is not _STOP:
+            batch.append(item)
+            remaining = deadline - time.perf_counter()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+        else:
+            self._stopping = True
+        return batch
+
+    def _run(self):
+        while not self._stopping:
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                X = np.stack([row for row, _, _ in batch])
+                labels, _, probabilities = self.predict_fn(X)
+                for i, (_, future, _) in enumerate(batch):
+                    future.set_result((labels[i], probabilities[i]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            done = time.perf_counter()
+            with self._lock:
+                self._batch_sizes.append(len(batch))
+                self._batch_times.append((done, len(batch)))
+                self._latencies.extend(done - submitted for _, _, submitted in batch)
+                self._completed += len(batch)
+
+    def stats(self):
+        """Latences p50/p99 (ms), débit (lignes/s) et taille moyenne des lots"""
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64) * 1000
+            batch_sizes = np.array(self._batch_sizes, dtype=np.float64)
+            completed = self._completed
+            # Débit mesuré sur la fenêtre glissante la plus récente
+            horizon = time.perf_counter() - self.throughput_window
+            recent = sum(n for t, n in self._batch_times if t >= horizon)
+        return {
+            'completed': completed,
+            'queue_depth': self.queue_depth(),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'mean_batch_size': round(float(batch_sizes.mean()), 2) if len(batch_sizes) else 0.0,
+            'latency_p50_ms': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else 0.0,
+            'latency_p99_ms': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else 0.0,
+            'throughput_per_s': round(recent / self.throughput_window, 2)
+        }
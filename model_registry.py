@@ -0,0 +1,210 @@
+"""Registre de modèles versionnés
+
+Arborescence:
+
+    models/
+        CURRENT                 nom de la version active
+        2025-04-07_rf/
+            model.joblib        (ou model.pkl, ou model.xgb: booster XGBoost natif)
+            label_encoder.joblib   (optionnel)
+            metadata.json       {"features": [...], "target_classes": {"0": "normal", ...}}
+
+Usage:
+    python model_registry.py list
+    python model_registry.py publish <version> <fichier_modele> <metadata.json> [label_encoder]
+    python model_registry.py activate <version>
+
+Une version publiée n'est jamais modifiée; changer de modèle revient à
+publier une nouvelle version puis à déplacer le pointeur CURRENT, que
+l'API surveille (voir api.py, MODEL_WATCH_INTERVAL).
+"""
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import types
+
+import numpy as np
+
+POINTER_FILE = 'CURRENT'
+METADATA_FILE = 'metadata.json'
+MODEL_FILES = ('model.joblib', 'model.pkl', 'model.xgb')
+LABEL_ENCODER_FILES = ('label_encoder.joblib', 'label_encoder.pkl')
+VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+# Noms des classes dans l'ordre des codes du LabelEncoder d'entraînement
+# (ordre alphabétique, voir xgboost.ipynb / model_prediction.ipynb)
+CLASS_NAMES = (
+    'avertissements_systeme', 'batterie_faible', 'disque_fin_de_vie', 'erreurs_systeme',
+    'normal', 'perte_paquets_reseau', 'probleme_ram', 'secteurs_defectueux',
+    'surcharge_cpu', 'surchauffe_carte_mere', 'surchauffe_gpu', 'temperature_elevee',
+)
+
+
+def class_name(label, class_names=CLASS_NAMES):
+    """Nom de classe d'un label, qu'il soit un code numérique ("7") ou déjà un nom"""
+    label = str(label)
+    if label.isdigit() and int(label) < len(class_names):
+        return class_names[int(label)]
+    return label
+
+
+class ModelValidationError(ValueError):
+    """Artefacts incohérents avec le schéma de features ou de classes attendu"""
+
+
+def check_version_name(version):
+    if not isinstance(version, str) or not VERSION_PATTERN.match(version):
+        raise ModelValidationError(f"Nom de version invalide: {version!r}")
+    return version
+
+
+def label_encoder_from_metadata(metadata, class_names=CLASS_NAMES):
+    """Table code -> nom de classe construite depuis target_classes
+
+    Les valeurs numériques ("7") sont traduites en noms de classes
+    (`class_names`), les autres sont conservées telles quelles.
+    """
+    target_classes = metadata.get('target_classes')
+    if not target_classes:
+        raise ModelValidationError("target_classes absent des métadonnées")
+    codes = sorted(int(code) for code in target_classes)
+    if codes != list(range(len(codes))):
+        raise ModelValidationError("Les codes de target_classes doivent aller de 0 à n-1")
+
+    names = [class_name(target_classes[str(code)], class_names) for code in codes]
+    return types.SimpleNamespace(classes_=np.array(names, dtype=object))
+
+
+def validate_artifacts(model, label_encoder, metadata, feature_columns):
+    """Vérifie l'ordre des features et la table des classes avant activation"""
+    features = list(metadata.get('features') or [])
+    if features != list(feature_columns):
+        raise ModelValidationError(f"Ordre des features différent de celui de l'API: {features}")
+
+    model_features = getattr(model, 'feature_names_in_', None)
+    if model_features is not None and list(model_features) != features:
+        raise ModelValidationError(f"Ordre des features du modèle différent des métadonnées: {list(model_features)}")
+    n_features = getattr(model, 'n_features_in_', len(features))
+    if n_features != len(features):
+        raise ModelValidationError(f"Le modèle attend {n_features} features, {len(features)} déclarées")
+
+    n_classes = len(label_encoder.classes_)
+    model_classes = getattr(model, 'classes_', None)
+    if model_classes is not None:
+        codes = np.asarray(model_classes)
+        if codes.dtype.kind not in 'iu' or codes.min() < 0 or codes.max() >= n_classes:
+            raise ModelValidationError(f"Classes du modèle hors de la table des labels: {codes.tolist()}")
+
+    target_classes = metadata.get('target_classes')
+    if target_classes and sorted(int(code) for code in target_classes) != list(range(n_classes)):
+        raise ModelValidationError("target_classes ne correspond pas à l'encodeur des labels")
+
+    # Essai à blanc: une ligne nulle doit donner une distribution complète
+    probabilities = np.asarray(model.predict_proba(np.zeros((1, len(features)))))
+    expected_columns = len(model_classes) if model_classes is not None else n_classes
+    if probabilities.shape != (1, expected_columns):
+        raise ModelValidationError(f"Sortie predict_proba inattendue: {probabilities.shape}")
+
+
+class ModelRegistry:
+    """Accès en lecture et publication des versions d'un répertoire de modèles"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, version, name=''):
+        return os.path.join(self.root, check_version_name(version), name)
+
+    def versions(self):
+        """Versions publiées, par ordre de nom"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if VERSION_PATTERN.match(name) and os.path.isfile(os.path.join(self.root, name, METADATA_FILE))
+        )
+
+    def current(self):
+        """Version pointée par CURRENT, ou la dernière publiée si le pointeur est absent"""
+        try:
+            with open(os.path.join(self.root, POINTER_FILE), encoding='utf-8') as f:
+                version = f.read().strip()
+            if version in self.versions():
+                return version
+        except OSError:
+            pass
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def set_current(self, version):
+        """Déplace le pointeur CURRENT (remplacement atomique du fichier)"""
+        if version not in self.versions():
+            raise ModelValidationError(f"Version inconnue: {version}")
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix='.CURRENT-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(version + '\n')
+        os.replace(tmp, os.path.join(self.root, POINTER_FILE))
+
+    def metadata(self, version):
+        with open(self.path(version, METADATA_FILE), encoding='utf-8') as f:
+            return json.load(f)
+
+    def _first_existing(self, version, names):
+        for name in names:
+            path = self.path(version, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def model_file(self, version):
+        path = self._first_existing(version, MODEL_FILES)
+        if path is None:
+            raise ModelValidationError(f"Aucun fichier de modèle dans la version {version}")
+        return path
+
+    def label_encoder_file(self, version):
+        return self._first_existing(version, LABEL_ENCODER_FILES)
+
+    def publish(self, version, model_file, metadata_file, label_encoder_file=None):
+        """Copie les artefacts dans une nouvelle version (renommage atomique du répertoire)"""
+        target = self.path(version)
+        if os.path.exists(target):
+            raise ModelValidationError(f"La version {version} existe déjà")
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.root, prefix=f'.{version}-')
+        try:
+            extension = os.path.splitext(model_file)[1]
+            shutil.copy2(model_file, os.path.join(staging, 'model' + extension))
+            shutil.copy2(metadata_file, os.path.join(staging, METADATA_FILE))
+            if label_encoder_file:
+                extension = os.path.splitext(label_encoder_file)[1]
+                shutil.copy2(label_encoder_file, os.path.join(staging, 'label_encoder' + extension))
+            os.rename(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return target
+
+
+def main(argv):
+    registry = ModelRegistry(os.environ.get('MODEL_REGISTRY', 'models'))
+    if len(argv) >= 1 and argv[0] == 'list':
+        current = registry.current()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+    elif len(argv) in (4, 5) and argv[0] == 'publish':
+        print(f"Version publiée: {registry.publish(*argv[1:])}")
+    elif len(argv) == 2 and argv[0] == 'activate':
+        registry.set_current(argv[1])
+        print(f"Version active: {argv[1]}")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """Cache LRU borné des sorties du modèle, indexé sur les features quantifiées
+
+    Deux lignes dont toutes les features tombent dans la même case de
+    largeur `resolution` partagent la même prédiction. `resolution` est un
+    scalaire ou un pas par feature.
+    """
+
+    def __init__(self, max_size=4096, resolution=0.5):
+        self.max_size = max_size
+        self.inverse_resolution = 1.0 / np.asarray(resolution, dtype=np.float64)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, row):
+        return np.rint(row * self.inverse_resolution).astype(np.int64).tobytes()
+
+    def get(self, key):
+        """Valeur associée à la clé, ou None (compte un hit ou un miss)"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache (changement de modèle); les compteurs sont conservés"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class ProbeCosts:
+    """Durées cumulées par sonde depuis le dernier rapport"""
+
+    def __init__(self):
+        self._costs = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            cost = self._costs.setdefault(name, [0, 0.0, 0.0])
+            cost[0] += 1
+            cost[1] += seconds
+            cost[2] = max(cost[2], seconds)
+
+    def timed(self, name, probe):
+        """Exécute `probe()` et cumule sa durée sous `name`, même en cas d'exception"""
+        start = time.perf_counter()
+        try:
+            return probe()
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self):
+        """{nom: {'calls', 'mean_ms', 'max_ms'}} puis remise à zéro"""
+        with self._lock:
+            costs, self._costs = self._costs, {}
+        return {
+            name: {'calls': calls, 'mean_ms': round(total / calls * 1000, 1), 'max_ms': round(peak * 1000, 1)}
+            for name, (calls, total, peak) in sorted(costs.items())
+        }
+
+    @staticmethod
+    def format(report):
+        return ', '.join(
+            f"{name} {cost['mean_ms']} ms (max {cost['max_ms']}, {cost['calls']} appels)"
+            for name, cost in report.items()
+        )
+
+
+class ProbeScheduler:
+    """Exécute en parallèle des sondes indépendantes, avec un délai maximal commun
+
+    `probes` associe un nom à une fonction sans argument. À chaque run(),
+    toutes les sondes sont lancées en même temps dans un pool de threads
+    gardé d'un cycle à l'autre (`initializer` est appelé une fois par
+    thread, par exemple pythoncom.CoInitialize pour WMI). Une sonde qui
+    échoue ou dépasse `timeout` secondes est remplacée par sa dernière
+    valeur connue (ou `defaults[nom]`); si elle tourne encore au cycle
+    suivant, elle n'est pas relancée, pour ne pas empiler les threads.
+
+    La durée de chaque sonde est cumulée dans `costs` (ProbeCosts).
+    """
+
+    def __init__(self, probes, defaults, timeout=5.0, initializer=None):
+        self.probes = dict(probes)
+        self.timeout = timeout
+        self.costs = ProbeCosts()
+        self._last = dict(defaults)
+        self._running = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.probes) + 1, thread_name_prefix='probe', initializer=initializer)
+
+    def run(self):
+        """Résultats de toutes les sondes (nom -> valeur) en au plus `timeout` secondes"""
+        for name, probe in self.probes.items():
+            future = self._running.get(name)
+            if future is None or future.done():
+                self._running[name] = self._executor.submit(self.costs.timed, name, probe)
+            else:
+                logging.warning(f"Sonde {name} toujours en cours depuis le cycle précédent, non relancée")
+
+        wait(self._running.values(), timeout=self.timeout)
+        for name, future in self._running.items():
+            if not future.done():
+                logging.warning(f"Sonde {name}: pas de réponse en {self.timeout} s")
+                continue
+            try:
+                self._last[name] = future.result()
+            except Exception as e:
+                logging.warning(f"Sonde {name} en échec: {e}")
+        return dict(self._last)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
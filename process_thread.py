@@ -0,0 +1,34 @@
+import os
+import threading
+
+
+class ProcessThread:
+    """Thread de fond démarré au premier besoin, une fois par processus
+
+    Les objets créés avant un fork (serve.py, preload_app) ne peuvent pas
+    utiliser le thread ni les files du parent. Au premier ensure_started()
+    de chaque processus, `setup()` recrée l'état propre au processus
+    (files, verrous) puis `target` est lancé dans un thread démon.
+    """
+
+    def __init__(self, target, name, setup=None):
+        self.target = target
+        self.name = name
+        self.setup = setup
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def running(self):
+        """Vrai si le thread a été démarré dans le processus courant"""
+        return self._pid == os.getpid()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self.setup is not None:
+                self.setup()
+            threading.Thread(target=self.target, name=self.name, daemon=True).start()
+            self._pid = os.getpid()
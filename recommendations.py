@@ -0,0 +1,106 @@
+import numpy as np
+
+# Seuils des recommandations
+THRESHOLDS = {
+    'cpu': {'warning': 85, 'critical': 95},
+    'ram': {'warning': 90, 'critical': 95},
+    'temp': {'warning': 60, 'critical': 80},
+    'sectors': {'warning': 10, 'critical': 50},
+    'errors': {'warning': 5, 'critical': 20}
+}
+
+# Par classe: (recommandation de base, règle critique (feature, seuil, message) ou None)
+CLASS_RULES = {
+    'surcharge_cpu': ("Vérifier les processus CPU",
+                      ('cpu_usage', THRESHOLDS['cpu']['critical'], "➜ Arrêt immédiat des processus non essentiels!")),
+    'probleme_ram': ("Fermer les applications inutiles",
+                     ('ram_usage', THRESHOLDS['ram']['critical'], "➜ Upgrade de RAM urgent requis!")),
+    'temperature_elevee': ("Nettoyer les ventilateurs",
+                           ('temperature', THRESHOLDS['temp']['critical'], "➜ Arrêt immédiat pour éviter les dommages!")),
+    'secteurs_defectueux': ("Surveiller l'état du disque",
+                            ('reallocated_sectors', THRESHOLDS['sectors']['critical'], "➜ Remplacer le disque immédiatement!")),
+    'erreurs_systeme': ("Analyser les logs système",
+                        ('read_errors', THRESHOLDS['errors']['critical'], "➜ Intervention technique nécessaire!")),
+    'avertissements_systeme': ("Examiner les avertissements", None),
+    'perte_paquets_reseau': ("Vérifier le réseau", None),
+    'surchauffe_carte_mere': ("Vérifier le refroidissement",
+                              ('temperature', 85, "➜ Arrêt immédiat requis!")),
+    'surchauffe_gpu': ("Réduire la charge GPU",
+                       ('temperature', 90, "➜ Arrêt des applications graphiques!")),
+    'disque_fin_de_vie': ("Planifier le remplacement", None),
+    'batterie_faible': ("Remplacer la batterie", None),
+    'normal': ("Aucune action requise", None),
+}
+
+# Recommandations supplémentaires, valables pour toutes les classes sauf celles exclues:
+# (feature, seuil, classe concernée? -> bool, message formaté avec la valeur)
+GENERAL_RULES = [
+    ('cpu_usage', THRESHOLDS['cpu']['warning'],
+     lambda label: label != "surcharge_cpu", "CPU élevé ({value}%) - surveiller"),
+    ('temperature', THRESHOLDS['temp']['warning'],
+     lambda label: "temperature" not in label, "Température élevée ({value}°C)"),
+]
+
+
+class RecommendationTable:
+    """Règles de recommandation compilées une fois pour un jeu de classes
+
+    Chaque règle devient un test de seuil vectorisé: pour un lot de
+    prédictions, toutes les règles sont évaluées en une passe NumPy,
+    puis les messages sont assemblés ligne par ligne.
+    """
+
+    def __init__(self, class_names, feature_columns):
+        self.class_names = list(class_names)
+        # Une ligne supplémentaire en fin de table pour les labels inconnus
+        self.class_index = {name: i for i, name in enumerate(self.class_names)}
+        self.unknown = len(self.class_names)
+        n_rows = len(self.class_names) + 1
+        feature_index = {name: i for i, name in enumerate(feature_columns)}
+
+        self.base_messages = [None] * n_rows
+        self.critical_feature = np.zeros(n_rows, dtype=np.intp)
+        self.critical_threshold = np.full(n_rows, np.inf)
+        self.critical_messages = [None] * n_rows
+        for i, name in enumerate(self.class_names):
+            base, critical = CLASS_RULES.get(name, (None, None))
+            self.base_messages[i] = base
+            if critical is not None:
+                feature, threshold, message = critical
+                self.critical_feature[i] = feature_index[feature]
+                self.critical_threshold[i] = threshold
+                self.critical_messages[i] = message
+
+        self.general_rules = []
+        for feature, threshold, applies_to, message in GENERAL_RULES:
+            mask = np.array([applies_to(name) for name in self.class_names] + [True])
+            self.general_rules.append((feature_index[feature], threshold, mask, message))
+
+    def labels_to_index(self, labels):
+        return np.fromiter((self.class_index.get(label, self.unknown) for label in labels),
+                           dtype=np.intp, count=len(labels))
+
+    def for_batch(self, labels, X):
+        """Listes de recommandations pour chaque ligne (labels prédits, features X)"""
+        X = np.asarray(X, dtype=np.float64)
+        rows = np.arange(len(X))
+        idx = self.labels_to_index(labels)
+
+        critical = X[rows, self.critical_feature[idx]] > self.critical_threshold[idx]
+        general = [
+            (X[:, feature], (X[:, feature] > threshold) & mask[idx], message)
+            for feature, threshold, mask, message in self.general_rules
+        ]
+
+        results = []
+        for r, i in enumerate(idx):
+            recommendations = []
+            if self.base_messages[i] is not None:
+                recommendations.append(self.base_messages[i])
+            if critical[r]:
+                recommendations.append(self.critical_messages[i])
+            for values, fired, message in general:
+                if fired[r]:
+                    recommendations.append(message.format(value=float(values[r])))
+            results.append(recommendations)
+        return results
@@ -0,0 +1,116 @@
+"""Serveur de production pour l'API de prédiction
+
+    python serve.py
+
+Sous Linux/macOS l'API tourne sous gunicorn avec API_WORKERS processus.
+Le modèle est chargé une seule fois dans le processus maître
+(preload_app) puis partagé par les workers en copy-on-write après le
+fork; gc.freeze() évite que le ramasse-miettes ne recopie ces pages.
+
+Un seul worker par défaut: l'état vivant de l'API est propre à chaque
+processus (dernier état par machine de /api/status et /api/hosts, flux
+/api/stream, métriques, cache de prédictions). Avec plusieurs workers,
+chaque requête ne voit que ce qu'a traité le worker qui la reçoit.
+API_WORKERS > 1 est donc réservé à un usage sans tableau de bord (envoi
+des collecteurs et /api/history, partagé via HISTORY_DB).
+
+Rechargement à chaud: `kill -HUP <pid du maître>` recharge les artefacts
+dans le maître, démarre de nouveaux workers puis arrête proprement les
+anciens une fois leurs requêtes en cours terminées. Sans redémarrage de
+workers, chaque processus suit aussi le pointeur CURRENT du registre de
+modèles (model_registry.py, POST /admin/model).
+
+Sous Windows (pas de fork) l'API tourne sous waitress, en un seul
+processus avec API_THREADS threads.
+"""
+import gc
+import logging
+import os
+import sys
+
+API_HOST = os.environ.get('API_HOST', '127.0.0.1')
+API_PORT = int(os.environ.get('API_PORT', 5000))
+API_WORKERS = int(os.environ.get('API_WORKERS', 1))
+# Threads peu coûteux: les prédictions simultanées sont bornées par le
+# contrôle d'admission d'api.py, calculé à partir de API_THREADS
+API_THREADS = int(os.environ.get('API_THREADS', 16))
+GRACEFUL_TIMEOUT = int(os.environ.get('API_GRACEFUL_TIMEOUT', 30))
+
+# Valeurs effectives, relues par api.py à l'import
+os.environ['API_WORKERS'] = str(API_WORKERS)
+os.environ['API_THREADS'] = str(API_THREADS)
+
+
+def serve_gunicorn():
+    """Plusieurs workers forkés depuis un maître qui détient le modèle"""
+    from gunicorn.app.base import BaseApplication
+
+    import api
+
+    def on_reload(server):
+        # Appelé dans le maître avant le lancement des nouveaux workers
+        gc.unfreeze()
+        api.reload_model()
+        gc.collect()
+        gc.freeze()
+
+    class ApiApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        'bind': f'{API_HOST}:{API_PORT}',
+        'workers': API_WORKERS,
+        'threads': API_THREADS,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        'on_reload': on_reload,
+    }
+
+    if API_WORKERS > 1:
+        logging.warning(f"{API_WORKERS} workers: /api/status, /api/hosts, /api/stream et /metrics "
+                        "ne reflètent que le worker qui répond (état non partagé)")
+
+    # Les objets chargés par le maître ne bougent plus: on les sort du GC
+    gc.collect()
+    gc.freeze()
+    logging.info(f"Démarrage gunicorn: {API_WORKERS} workers x {API_THREADS} threads sur {options['bind']}")
+    ApiApplication(api.app, options).run()
+
+
+def serve_waitress():
+    """Un seul processus multi-threadé (Windows)"""
+    from waitress import serve
+
+    import api
+
+    logging.info(f"Démarrage waitress: {API_THREADS} threads sur {API_HOST}:{API_PORT}")
+    serve(api.app, host=API_HOST, port=API_PORT, threads=API_THREADS)
+
+
+def main():
+    if os.name == 'posix':
+        try:
+            import gunicorn  # noqa: F401
+            return serve_gunicorn()
+        except ImportError:
+            print("gunicorn non installé, utilisation de waitress")
+    try:
+        return serve_waitress()
+    except ImportError:
+        print("Installer gunicorn (Linux) ou waitress (Windows): pip install gunicorn waitress")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
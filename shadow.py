@@ -0,0 +1,144 @@
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from process_thread import ProcessThread
+
+
+class ShadowEvaluator:
+    """Évaluation d'un modèle candidat sur le trafic réel, hors du chemin de réponse
+
+    Les requêtes déposent leurs lignes de features et les labels du modèle
+    principal dans une file bornée (sans attente: si la file est pleine,
+    l'échantillon est abandonné et compté). Un thread dédié évalue le
+    candidat par lots et cumule le taux d'accord, la matrice de confusion
+    principal -> candidat et la latence du candidat.
+
+    `predict_fn(X)` retourne (labels, confidences, probabilities) comme
+    InferenceEngine.predict. `normalize` ramène les labels des deux modèles
+    à des noms comparables. Le thread est démarré au premier submit() de
+    chaque processus (fork de serve.py).
+    """
+
+    def __init__(self, predict_fn, name, normalize=str, max_queue=1000, max_batch_size=256,
+                 max_wait_ms=50.0, sample_rate=1.0, stats_window=10000, latency_histogram=None):
+        self.predict_fn = predict_fn
+        self.name = name
+        self.normalize = normalize
+        self.max_queue = max_queue
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.sample_rate = sample_rate
+        self.latency_histogram = latency_histogram
+        self._worker = ProcessThread(self._run, 'shadow', setup=self._setup)
+        self._queue = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=stats_window)
+        self._confusion = {}
+        self.compared = 0
+        self.agreed = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def _setup(self):
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+
+    def submit(self, X, primary_labels):
+        """Dépose un lot (copié) et les labels du modèle principal; ne bloque jamais"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self._worker.ensure_started()
+        try:
+            self._queue.put_nowait((np.array(X, dtype=np.float64, ndmin=2), list(primary_labels)))
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(primary_labels)
+
+    def _collect(self):
+        """Regroupe les lots reçus pendant max_wait_ms, jusqu'à max_batch_size lignes
+
+        Des appels moins nombreux et plus gros laissent davantage de temps
+        (et le GIL) aux threads de requête.
+        """
+        items = [self._queue.get()]
+        rows = len(items[0][1])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[1])
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            X = np.concatenate([rows for rows, _ in items])
+            primary = [label for _, labels in items for label in labels]
+            try:
+                start = time.perf_counter()
+                candidate, _, _ = self.predict_fn(X)
+                elapsed = time.perf_counter() - start
+            except Exception:
+                with self._lock:
+                    self.errors += len(primary)
+                continue
+
+            if self.latency_histogram is not None:
+                self.latency_histogram.observe(elapsed, self.name)
+            pairs = [(self.normalize(p), self.normalize(c)) for p, c in zip(primary, candidate)]
+            with self._lock:
+                self._latencies.append((elapsed, len(X)))
+                self.compared += len(pairs)
+                for pair in pairs:
+                    self._confusion[pair] = self._confusion.get(pair, 0) + 1
+                    if pair[0] == pair[1]:
+                        self.agreed += 1
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._worker.running() else 0
+
+    def stats(self):
+        """Taux d'accord, confusion par classe du principal, latence du candidat"""
+        with self._lock:
+            latencies = np.array([t for t, _ in self._latencies], dtype=np.float64) * 1000
+            rows = sum(n for _, n in self._latencies)
+            confusion = dict(self._confusion)
+            compared, agreed = self.compared, self.agreed
+            dropped, errors = self.dropped, self.errors
+
+        per_class = {}
+        for (primary, candidate), count in sorted(confusion.items()):
+            entry = per_class.setdefault(primary, {'total': 0, 'agreed': 0, 'candidate': {}})
+            entry['total'] += count
+            entry['candidate'][candidate] = count
+            if primary == candidate:
+                entry['agreed'] += count
+        for entry in per_class.values():
+            entry['agreement_rate'] = round(entry['agreed'] / entry['total'], 4)
+
+        return {
+            'candidate': self.name,
+            'compared': compared,
+            'agreement_rate': round(agreed / compared, 4) if compared else 0.0,
+            'dropped': dropped,
+            'errors': errors,
+            'queue_depth': self.queue_depth(),
+            'sample_rate': self.sample_rate,
+            # Latence d'un appel au candidat (un lot) et coût moyen par ligne
+            'call_latency_p50_ms': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else 0.0,
+            'call_latency_p99_ms': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else 0.0,
+            'mean_batch_size': round(rows / len(latencies), 2) if len(latencies) else 0.0,
+            'latency_per_row_ms': round(float(latencies.sum()) / rows, 4) if rows else 0.0,
+            'confusion': per_class
+        }
@@ -0,0 +1,167 @@
+import os
+import re
+import threading
+import time
+
+SEGMENT_PATTERN = re.compile(r'^(\d{10})\.seg$')
+CURSOR_FILE = 'cursor'
+
+
+class DiskSpool:
+    """File persistante d'enregistrements de taille fixe (store-and-forward)
+
+    Les enregistrements sont ajoutés en fin de segments numérotés
+    (0000000001.seg, ...) de `segment_records` enregistrements. Le lecteur
+    avance un curseur (segment, position) sauvegardé dans `cursor`; un
+    segment entièrement acquitté est supprimé. Au-delà de `max_bytes`, les
+    plus anciens segments sont supprimés, lus ou non (comptés dans
+    `evicted`).
+
+    Les écritures vont directement au système (sans tampon Python) et ne
+    sont synchronisées sur disque (fsync) que tous les `fsync_every`
+    enregistrements ou `fsync_interval` secondes. Une coupure de courant
+    peut donc perdre les derniers échantillons, jamais la cohérence des
+    segments (une fin incomplète est tronquée à l'ouverture).
+
+    Un thread écrit (append), un autre lit (peek / ack).
+    """
+
+    def __init__(self, directory, record_size, max_bytes=16 * 1024 * 1024, segment_records=1000,
+                 fsync_every=10, fsync_interval=30.0):
+        self.directory = directory
+        self.record_size = record_size
+        self.max_bytes = max_bytes
+        self.segment_records = segment_records
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self.evicted = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # Nombre d'enregistrements complets par segment; fin incomplète tronquée
+        self._sizes = {}
+        for name in sorted(os.listdir(directory)):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                path = os.path.join(directory, name)
+                records, torn = divmod(os.path.getsize(path), record_size)
+                if torn:
+                    os.truncate(path, records * record_size)
+                self._sizes[int(match.group(1))] = records
+
+        self._write_seq = max(self._sizes, default=0)
+        if not self._sizes or self._sizes[self._write_seq] >= segment_records:
+            self._write_seq += 1
+            self._sizes[self._write_seq] = 0
+        self._writer = open(self._path(self._write_seq), 'ab', buffering=0)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._read_seq, self._read_offset = self._load_cursor()
+        if self._read_seq not in self._sizes:
+            self._read_seq, self._read_offset = min(self._sizes), 0
+        self._read_offset = min(self._read_offset, self._sizes[self._read_seq])
+
+    def _path(self, seq):
+        return os.path.join(self.directory, f'{seq:010d}.seg')
+
+    def _load_cursor(self):
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE), encoding='utf-8') as f:
+                seq, offset = f.read().split()
+            return int(seq), int(offset)
+        except (OSError, ValueError):
+            return 0, 0
+
+    def _save_cursor(self):
+        # Curseur perdu = enregistrements renvoyés une seconde fois, jamais perdus
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(f'{self._read_seq} {self._read_offset}\n')
+        os.replace(path + '.tmp', path)
+
+    def _sync(self):
+        os.fsync(self._writer.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _drop_segment(self, seq):
+        """Supprime un segment qui n'est plus en écriture et recale le curseur"""
+        records = self._sizes.pop(seq)
+        os.remove(self._path(seq))
+        if seq == self._read_seq:
+            self._read_seq, self._read_offset = min(self._sizes), 0
+            self._save_cursor()
+        return records
+
+    def append(self, record):
+        """Ajoute un ou plusieurs enregistrements (bytes, multiple de record_size)"""
+        count = len(record) // self.record_size
+        with self._lock:
+            if self._sizes[self._write_seq] >= self.segment_records:
+                self._sync()
+                self._writer.close()
+                self._write_seq += 1
+                self._sizes[self._write_seq] = 0
+                self._writer = open(self._path(self._write_seq), 'ab', buffering=0)
+
+            self._writer.write(record)
+            self._sizes[self._write_seq] += count
+            self._unsynced += count
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+            # Taille bornée: les segments les plus anciens partent en premier
+            while len(self._sizes) > 1 and sum(self._sizes.values()) * self.record_size > self.max_bytes:
+                oldest = min(self._sizes)
+                unread = self._sizes[oldest] - (self._read_offset if oldest == self._read_seq else 0)
+                if oldest >= self._read_seq:
+                    self.evicted += unread
+                self._drop_segment(oldest)
+            self._available.notify_all()
+
+    def peek(self, max_records):
+        """(jeton, données) des plus anciens enregistrements non acquittés, sans les retirer"""
+        with self._lock:
+            while (self._read_offset >= self._sizes[self._read_seq]
+                   and self._read_seq != self._write_seq):
+                # Segment lu en entier et clos: il n'a plus de raison d'exister
+                self._drop_segment(self._read_seq)
+            count = min(self._sizes[self._read_seq] - self._read_offset, max_records)
+            if count <= 0:
+                return None, b''
+            with open(self._path(self._read_seq), 'rb') as f:
+                f.seek(self._read_offset * self.record_size)
+                data = f.read(count * self.record_size)
+            return (self._read_seq, self._read_offset), data
+
+    def ack(self, token, count):
+        """Retire `count` enregistrements lus par peek(); ignoré si le segment a été évincé entre-temps"""
+        with self._lock:
+            if token != (self._read_seq, self._read_offset):
+                return
+            self._read_offset += count
+            self._save_cursor()
+
+    def wait(self, timeout, count=1):
+        """Attend au plus `timeout` secondes que `count` enregistrements soient disponibles
+
+        Peut rendre la main plus tôt (à chaque ajout): l'appelant réévalue.
+        """
+        with self._available:
+            if self._pending() < count:
+                self._available.wait(timeout)
+
+    def _pending(self):
+        return sum(self._sizes.values()) - self._read_offset
+
+    def pending(self):
+        with self._lock:
+            return self._pending()
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            self._writer.close()
+            self._save_cursor()
@@ -2,8 +2,8 @@
 REM Place le .bat dans le dossier Monitor (C:\Users\FANNY\Desktop\Monitor)
 cd /d "%~dp0"
 
-echo Lancement de api.py...
-start "API" cmd /k python api.py
+echo Lancement de serve.py (API)...
+start "API" cmd /k python serve.py
 
 timeout /t 2 >nul  && echo Lancement de dashboard.py...
 start "Dashboard" cmd /k python TabdeBord.py
@@ -8,7 +8,7 @@ def start_api():
     """Démarre le serveur API Flask"""
     try:
         api_process = subprocess.Popen(
-            [sys.executable, "api.py"],
+            [sys.executable, "serve.py"],
             stdout=open('api.log', 'w'),
             stderr=subprocess.STDOUT,
             env=os.environ
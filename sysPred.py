@@ -2,7 +2,8 @@ import psutil
 import mysql.connector
 import pandas as pd
 import time
-import wmi
+from probe_scheduler import ProbeCosts
+from wmi_probes import WMIProbe
 import win32evtlog
 from datetime import datetime
 import sys
@@ -22,6 +23,11 @@ def run_as_admin():
 
 run_as_admin()
 
+# Connexions WMI réutilisées d'un cycle à l'autre, données SMART lues une fois par cycle
+wmi_probe = WMIProbe()
+# Durée des sondes du cycle en cours
+probe_costs = ProbeCosts()
+
 # Configuration MySQL
 DB_CONFIG = {
     "host": "localhost",
@@ -96,12 +102,12 @@ def setup_database():
 # Capture des métriques système
 def get_system_metrics():
     try:
-        c = wmi.WMI()
         motherboard_temp = None
         try:
-            sensors = c.MSAcpi_ThermalZoneTemperature()
+            # Zones ACPI (espace root\wmi, connexion partagée)
+            sensors = wmi_probe.thermal_zones()
             if sensors:
-                motherboard_temp = (sensors[0].CurrentTemperature / 10.0) - 273.15
+                motherboard_temp = (sensors[0] / 10.0) - 273.15
         except Exception:
             motherboard_temp = 0
 
@@ -134,29 +140,27 @@ def get_system_metrics():
 # Capture des données SMART
 def get_smart_data():
     try:
-        smart = wmi.WMI(namespace="root\\wmi")
-        disks = smart.MSStorageDriver_FailurePredictStatus()
+        # Statut et blobs SMART lus une seule fois par cycle pour tous les disques
+        blobs = list(wmi_probe.smart_blobs().values())
         disk_info = []
-        for disk in disks:
-            status = "OK" if not disk.PredictFailure else "Failing"
-            model = disk.InstanceName
+        for model, failing in wmi_probe.failure_status().items():
+            status = "OK" if not failing else "Failing"
 
             # Récupérer les données supplémentaires SMART
-            smart_data = smart.MSStorageDriver_ATAPISmartData()
+            blob = wmi_probe.smart_blob(model)
             power_on_hours = 0
             reallocated_sectors = 0
             read_errors = 0
             write_errors = 0
-            for data in smart_data:
-                if model in data.InstanceName:
-                    power_on_hours = int.from_bytes(data.VendorSpecific[192:194], byteorder='little')
-                    reallocated_sectors = int.from_bytes(data.VendorSpecific[196:198], byteorder='little')
-                    read_errors = int.from_bytes(data.VendorSpecific[200:202], byteorder='little')
-                    write_errors = int.from_bytes(data.VendorSpecific[204:206], byteorder='little')
+            if blob is not None:
+                power_on_hours = int.from_bytes(blob[192:194], byteorder='little')
+                reallocated_sectors = int.from_bytes(blob[196:198], byteorder='little')
+                read_errors = int.from_bytes(blob[200:202], byteorder='little')
+                write_errors = int.from_bytes(blob[204:206], byteorder='little')
 
             temp = None
-            if smart.MSStorageDriver_ATAPISmartData():
-                temp = smart.MSStorageDriver_ATAPISmartData()[0].VendorSpecific[194]
+            if blobs:
+                temp = blobs[0][194]
 
             disk_info.append({
                 "timestamp": datetime.now(),
@@ -272,17 +276,20 @@ def monitor_system(interval=20):  # Par défaut, collecte toutes les 5 minutes
     print("Monitoring en cours...")
     try:
         while True:
-            metrics = get_system_metrics()
+            wmi_probe.new_cycle()
+            metrics = probe_costs.timed('metrics', get_system_metrics)
             if metrics:
                 insert_metrics(metrics)
 
-            smart_data = get_smart_data()
+            smart_data = probe_costs.timed('smart', get_smart_data)
             if smart_data:
                 insert_smart_data(smart_data)
 
-            logs = get_windows_logs()
+            logs = probe_costs.timed('logs', get_windows_logs)
             if logs:
                 insert_logs(logs)
+            logging.info(f"Coût des sondes: {ProbeCosts.format(probe_costs.report())}")
+            logging.info(f"Requêtes WMI: {ProbeCosts.format(wmi_probe.costs.report())}")
 
             print(f"{metrics['timestamp']} - CPU: {metrics['cpu_usage']}%, RAM: {metrics['ram_usage']}%, Disque: {metrics['disk_usage']}%, Carte mère: {metrics['motherboard_temp']}°C")
             time.sleep(interval)
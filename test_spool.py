@@ -0,0 +1,96 @@
+"""Tests de non-régression du spool disque (spool.py) et de son envoi (collect.forward_spool)"""
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from spool import DiskSpool
+
+
+def records(*values):
+    return b''.join(value.to_bytes(4, 'little') for value in values)
+
+
+def values(data):
+    return np.frombuffer(data, dtype='<u4').tolist()
+
+
+def test_torn_write_truncated_on_reopen(tmp_path):
+    spool = DiskSpool(str(tmp_path), 4)
+    spool.append(records(1, 2, 3))
+    spool.close()
+    # Coupure pendant une écriture: enregistrement incomplet en fin de segment
+    segment = tmp_path / '0000000001.seg'
+    with open(segment, 'ab') as f:
+        f.write(b'\x04\x00')
+
+    spool = DiskSpool(str(tmp_path), 4)
+    assert os.path.getsize(segment) == 12
+    assert spool.pending() == 3
+    spool.append(records(4))
+    _, data = spool.peek(10)
+    assert values(data) == [1, 2, 3, 4]
+    spool.close()
+
+
+def test_eviction_across_segments(tmp_path):
+    spool = DiskSpool(str(tmp_path), 4, max_bytes=5 * 4, segment_records=2)
+    for value in range(4):
+        spool.append(records(value))
+    # Un enregistrement du plus ancien segment déjà envoyé
+    token, data = spool.peek(1)
+    spool.ack(token, 1)
+
+    for value in range(4, 8):
+        spool.append(records(value))
+
+    # Deux segments supprimés: un non lu (1), puis un entier (2, 3)
+    assert spool.evicted == 3
+    assert spool.pending() == 4
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.seg')]) == 2
+    received = []
+    while spool.pending():
+        token, data = spool.peek(10)
+        received += values(data)
+        spool.ack(token, len(data) // 4)
+    assert received == [4, 5, 6, 7]
+    spool.close()
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="l'import de collect.py demande les droits administrateur")
+def test_forward_spool_drops_only_rejected_samples(tmp_path, monkeypatch):
+    monkeypatch.setenv('COLLECT_EVENT_LOG', os.devnull)
+    collect = pytest.importorskip('collect')
+    from binary_protocol import encode_records
+
+    spool = DiskSpool(str(tmp_path), collect.RECORD.itemsize)
+    samples = [('h', 1.0, [float('nan') if i == 5 else float(i)] + [0.0] * 8) for i in range(20)]
+    spool.append(encode_records(samples))
+
+    stop = threading.Event()
+    sent, delivered = [], []
+
+    def send_records(data):
+        batch = np.frombuffer(data, dtype=collect.RECORD)
+        sent.append(len(batch))
+        if np.isnan(batch['features']).any():
+            return 400, None
+        delivered.extend(batch['features'][:, 0].astype(int).tolist())
+        if len(delivered) == 19:
+            stop.set()
+        return 200, None
+
+    monkeypatch.setattr(collect, 'send_records', send_records)
+    monkeypatch.setattr(collect, 'REPLAY_BATCH_SIZE', 8)
+    monkeypatch.setattr(collect, 'COLLECT_INTERVAL', 0.01)
+    sender = threading.Thread(target=collect.forward_spool, args=(spool, stop))
+    sender.start()
+    sender.join(10)
+    assert not sender.is_alive()
+
+    assert delivered == [i for i in range(20) if i != 5]
+    assert spool.pending() == 0
+    # Après une moitié acceptée, retour aux lots complets
+    assert sent[:3] == [8, 4, 8]
+    spool.close()
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from probe_scheduler import ProbeCosts
+
+# Espace de noms des capteurs (températures ACPI, SMART)
+WMI_NAMESPACE = 'root\\wmi'
+
+
+class WMIProbe:
+    """Accès WMI partagé par les sondes de collect.py, sysPred.py et predictor.py
+
+    - Les connexions wmi.WMI() sont ouvertes une fois par thread et par
+      espace de noms (objets COM liés à leur thread), puis réutilisées
+      d'un cycle à l'autre.
+    - Une requête qui échoue sur une classe jusque-là lisible rouvre la
+      connexion une fois (service WMI redémarré, connexion périmée). Une
+      classe qui échoue aussi sur une connexion neuve (capteur absent)
+      n'entraîne plus de reconnexion.
+    - Les lectures coûteuses (blobs SMART par disque, statut de panne,
+      zones thermiques) sont converties en valeurs Python et gardées
+      jusqu'au prochain new_cycle(), quel que soit le nombre de disques ou
+      de sondes qui les demandent.
+
+    La durée de chaque requête WMI est cumulée dans `costs` (ProbeCosts).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._failing = set()
+        self.costs = ProbeCosts()
+        self.reconnects = 0
+
+    def _connection(self, namespace):
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        connection = connections.get(namespace)
+        if connection is None:
+            import wmi
+            connection = connections[namespace] = wmi.WMI(namespace=namespace)
+        return connection
+
+    def query(self, class_name, namespace=WMI_NAMESPACE):
+        """Instances d'une classe WMI, sur la connexion du thread courant"""
+        start = time.perf_counter()
+        try:
+            try:
+                result = getattr(self._connection(namespace), class_name)()
+            except Exception:
+                if (namespace, class_name) in self._failing:
+                    raise
+                # Peut-être la connexion elle-même: une seule reconnexion
+                self._local.connections.pop(namespace, None)
+                self.reconnects += 1
+                try:
+                    result = getattr(self._connection(namespace), class_name)()
+                except Exception:
+                    self._failing.add((namespace, class_name))
+                    raise
+            self._failing.discard((namespace, class_name))
+            return result
+        finally:
+            self.costs.record(class_name, time.perf_counter() - start)
+
+    def new_cycle(self):
+        """Oublie les lectures du cycle précédent"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _cached(self, key, load):
+        with self._cache_lock:
+            if key in self._cache:
+                return self._cache[key]
+        value = load()
+        with self._cache_lock:
+            self._cache[key] = value
+        return value
+
+    def smart_blobs(self):
+        """{InstanceName: octets VendorSpecific} de MSStorageDriver_ATAPISmartData"""
+        return self._cached('smart', lambda: {
+            data.InstanceName: bytes(data.VendorSpecific)
+            for data in self.query('MSStorageDriver_ATAPISmartData')
+        })
+
+    def failure_status(self):
+        """{InstanceName: panne prédite} de MSStorageDriver_FailurePredictStatus"""
+        return self._cached('failure', lambda: {
+            disk.InstanceName: bool(disk.PredictFailure)
+            for disk in self.query('MSStorageDriver_FailurePredictStatus')
+        })
+
+    def thermal_zones(self):
+        """Températures des zones ACPI en dixièmes de kelvin (MSAcpi_ThermalZoneTemperature)"""
+        return self._cached('thermal', lambda: [
+            int(zone.CurrentTemperature) for zone in self.query('MSAcpi_ThermalZoneTemperature')
+        ])
+
+    def smart_blob(self, instance_name):
+        """Blob SMART d'un disque (InstanceName du statut de panne), ou None"""
+        for name, blob in self.smart_blobs().items():
+            if instance_name in name:
+                return blob
+        return None
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+
+# Extensions des boosters XGBoost natifs (Booster.save_model)
+XGB_EXTENSIONS = ('.xgb', '.json', '.ubj')
+
+
+class XGBoostBooster:
+    """Booster XGBoost natif derrière l'interface predict_proba / classes_
+
+    Charge directement le fichier de Booster.save_model (model_deployment/
+    model.xgb), sans l'enveloppe sklearn ni pickle. Les lots sont évalués
+    par inplace_predict sur le tableau NumPy, sans construction de DMatrix.
+    Avec l'objectif multi:softmax (sortie = classe), les probabilités sont
+    recalculées depuis les marges, comme XGBClassifier.predict_proba.
+    """
+
+    def __init__(self, booster, n_threads=0):
+        self.booster = booster
+        if n_threads:
+            booster.set_param({'nthread': n_threads})
+        config = json.loads(booster.save_config())['learner']
+        self.objective = config['objective']['name']
+        n_classes = int(config['learner_model_param'].get('num_class', 0))
+        self.classes_ = np.arange(max(n_classes, 2))
+        self.feature_names_in_ = np.array(booster.feature_names, dtype=object) if booster.feature_names else None
+        self.n_features_in_ = booster.num_features()
+
+    @classmethod
+    def load(cls, path, n_threads=0):
+        try:
+            import xgboost
+        except ImportError as e:
+            raise ImportError("xgboost requis pour les modèles .xgb: pip install xgboost") from e
+        booster = xgboost.Booster()
+        booster.load_model(path)
+        return cls(booster, n_threads)
+
+    def predict_proba(self, X):
+        """Probabilités par classe, forme (n_lignes, n_classes)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.objective == 'multi:softprob':
+            return np.asarray(self.booster.inplace_predict(X), dtype=np.float64)
+
+        margins = np.asarray(self.booster.inplace_predict(X, predict_type='margin'), dtype=np.float64)
+        if margins.ndim == 1:
+            # Binaire: une marge par ligne -> sigmoïde
+            positive = 1.0 / (1.0 + np.exp(-margins))
+            return np.column_stack([1.0 - positive, positive])
+        # Softmax stable numériquement
+        margins -= margins.max(axis=1, keepdims=True)
+        np.exp(margins, out=margins)
+        margins /= margins.sum(axis=1, keepdims=True)
+        return margins
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]